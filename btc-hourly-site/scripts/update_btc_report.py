@@ -1,27 +1,60 @@
 #!/usr/bin/env python3
 import json
+import os
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Dict
 from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
 
+# The shared bar cache lives with the stock report scripts (same venv, see README).
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "stock-report-site" / "scripts"))
+from bar_cache import BarCache, cached_history  # noqa: E402
+from indicators import IndicatorStore  # noqa: E402
+
 TZ = ZoneInfo("Asia/Taipei")
+SYMBOL = "BTC-USD"
+CACHE_FILE = Path(__file__).resolve().parent.parent / "data" / "cache" / "bars.sqlite"
+INDICATOR_FILE = CACHE_FILE.with_name("indicators.json")
+FRAME_DIR = "frames"
+# strftime formats that are plain slices of an ISO "YYYY-MM-DD HH:MM" string.
+ISO_SLICES = {
+    "%Y-%m-%d %H:%M": (0, 16),
+    "%m-%d %H:%M": (5, 16),
+    "%Y-%m-%d": (0, 10),
+    "%Y-%m": (0, 7),
+    "%Y": (0, 4),
+}
+HOURLY_PERIOD = "14d"
+DAILY_PERIOD = "10y"
 
 
-def fmt(value, digits=2):
-    if value is None:
-        return None
-    return round(float(value), digits)
+def local_index(index: pd.Index) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        return index.tz_convert(TZ)
+    return index.tz_localize(TZ)
+
 
+def format_times(index: pd.DatetimeIndex, time_format: str) -> list:
+    span = ISO_SLICES.get(time_format)
+    if span is None:
+        return index.strftime(time_format).tolist()
+    # Slice the fixed-width ISO strings ("YYYY-MM-DDTHH:MM") as a character grid.
+    iso = np.datetime_as_string(index.tz_localize(None).to_numpy(), unit="m").astype("U16")
+    chars = iso.view("U1").reshape(len(iso), 16).copy()
+    chars[:, 10] = " "
+    start, end = span
+    return np.ascontiguousarray(chars[:, start:end]).view(f"U{end - start}").ravel().tolist()
 
-def normalize_ts(idx) -> datetime:
-    ts = pd.Timestamp(idx)
-    if ts.tzinfo is not None:
-        return ts.tz_convert(TZ)
-    return ts.tz_localize(TZ)
+
+def rounded(values: np.ndarray, digits: int) -> list:
+    # Python's round() rather than np.round, which can differ in the last digit.
+    return [None if v != v else round(v, digits) for v in values.tolist()]
 
 
 def close_series(frame: pd.DataFrame) -> pd.Series:
@@ -34,72 +67,80 @@ def build_frame(series: pd.Series, *, label: str, interval: str, time_format: st
     if series is None or len(series) < 2:
         return None
 
-    latest_val = series.iloc[-1]
-    prev_val = series.iloc[-2]
-    change = latest_val - prev_val if prev_val is not None else None
-    change_pct = ((change / prev_val) * 100) if (change is not None and prev_val not in (None, 0)) else None
-
-    trend = []
-    for idx, val in series.tail(trend_points).items():
-        ts = normalize_ts(idx)
-        trend.append({"time": ts.strftime(time_format), "close": fmt(val, 2)})
-
-    rows = []
-    tail = series.tail(table_points + 1)
-    prev = None
-    for idx, val in tail.items():
-        if prev is None:
-            prev = val
-            continue
-        ts = normalize_ts(idx)
-        delta = val - prev
-        pct = (delta / prev) * 100 if prev else None
-        rows.append(
-            {
-                "label": ts.strftime(time_format),
-                "price": fmt(val, 2),
-                "change": fmt(delta, 2),
-                "changePercent": fmt(pct, 3),
-            }
-        )
-        prev = val
+    # Only the tail that is emitted is converted and formatted.
+    tail = series.iloc[-max(trend_points, table_points + 1):]
+    values = tail.to_numpy(dtype=float)
+    labels = format_times(local_index(tail.index), time_format)
+    prev = values[:-1]
+    delta = values[1:] - prev
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(prev != 0, delta / prev * 100, np.nan)
+    prices = rounded(values, 2)
+    changes = rounded(delta, 2)
+    pcts = rounded(pct, 3)
 
+    # Columnar: parallel arrays instead of one dict per point.
+    trend_start = len(values) - min(trend_points, len(values))
+    table_start = max(len(delta) - table_points, 0)
     return {
         "label": label,
         "interval": interval,
         "latest": {
-            "price": fmt(latest_val, 2),
-            "change": fmt(change, 2),
-            "changePercent": fmt(change_pct, 3),
+            "price": prices[-1],
+            "change": changes[-1],
+            "changePercent": pcts[-1],
+        },
+        "series": {"t": labels[trend_start:], "c": prices[trend_start:]},
+        "table": {
+            "t": labels[table_start + 1:],
+            "c": prices[table_start + 1:],
+            "d": changes[table_start:],
+            "p": pcts[table_start:],
         },
-        "series": trend,
-        "table": rows,
     }
 
 
+def resample_closes(daily_series: pd.Series, rule: str) -> pd.Series:
+    """Last daily close per calendar bucket, labelled like Yahoo's bars (bucket start, UTC)."""
+    if daily_series is None or daily_series.empty:
+        return pd.Series(dtype=float)
+    series = daily_series
+    if series.index.tz is None:
+        series = series.tz_localize("UTC")
+    return series.tz_convert("UTC").resample(rule, closed="left", label="left").last().dropna()
+
+
 def build_yearly_frame(monthly_series: pd.Series) -> pd.Series:
     if monthly_series is None or monthly_series.empty:
         return pd.Series(dtype=float)
-    year_map: Dict[int, float] = {}
-    ts_map: Dict[int, datetime] = {}
-    for idx, val in monthly_series.items():
-        ts = normalize_ts(idx)
-        year_map[ts.year] = val
-        ts_map[ts.year] = ts
-    years = sorted(year_map.keys())
-    values = [year_map[y] for y in years]
-    indices = [ts_map[y] for y in years]
-    return pd.Series(values, index=pd.Index(indices))
+    local = monthly_series.index.tz_convert(TZ) if monthly_series.index.tz is not None else monthly_series.index.tz_localize(TZ)
+    # Keep the last month of each (Taipei) year, indexed by that month.
+    last_of_year = ~local.year.duplicated(keep="last")
+    return pd.Series(monthly_series.to_numpy()[last_of_year], index=local[last_of_year])
 
 
 def build_report():
     now = datetime.now(tz=TZ)
-    ticker = yf.Ticker("BTC-USD")
+    ticker = yf.Ticker(SYMBOL)
 
-    hourly_series = close_series(ticker.history(period="14d", interval="1h", auto_adjust=False))
-    daily_series = close_series(ticker.history(period="360d", interval="1d", auto_adjust=False))
-    weekly_series = close_series(ticker.history(period="5y", interval="1wk", auto_adjust=False))
-    monthly_series = close_series(ticker.history(period="10y", interval="1mo", auto_adjust=False))
+    def history(period: str, interval: str) -> pd.DataFrame:
+        def download(start):
+            if start is None:
+                return ticker.history(period=period, interval=interval, auto_adjust=False)
+            return ticker.history(start=start, interval=interval, auto_adjust=False)
+
+        return cached_history(cache, SYMBOL, interval, period, download)
+
+    cache = BarCache(CACHE_FILE)
+    try:
+        hourly_series = close_series(history(HOURLY_PERIOD, "1h"))
+        # Ten years of daily bars cover every longer frame, so they are resampled locally
+        # instead of downloading 1wk/1mo bars separately.
+        daily_series = close_series(history(DAILY_PERIOD, "1d"))
+    finally:
+        cache.close()
+    weekly_series = resample_closes(daily_series, "W-MON")
+    monthly_series = resample_closes(daily_series, "MS")
     yearly_series = build_yearly_frame(monthly_series)
 
     frames = {}
@@ -146,6 +187,7 @@ def build_report():
         },
     }
 
+    indicator_store = IndicatorStore(INDICATOR_FILE)
     for key, cfg in frame_defs.items():
         frame = build_frame(
             cfg["series"],
@@ -156,14 +198,18 @@ def build_report():
             table_points=cfg["table_points"],
         )
         if frame:
+            indicators = indicator_store.indicators(f"{SYMBOL}:{key}", cfg["series"])
+            if indicators:
+                frame["indicators"] = indicators
             frames[key] = frame
+    indicator_store.save()
 
     default_frame = "day" if "day" in frames else next(iter(frames.keys()), None)
 
     return {
         "updatedAt": now.isoformat(),
         "timezone": "Asia/Taipei",
-        "asset": "BTC-USD",
+        "asset": SYMBOL,
         "defaultFrame": default_frame,
         "source": {
             "name": "Yahoo Finance",
@@ -174,16 +220,46 @@ def build_report():
     }
 
 
+def write_json(path: Path, payload: Dict) -> int:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(body, encoding="utf-8")
+    os.replace(tmp, path)
+    return len(body.encode("utf-8"))
+
+
+def write_report(report: Dict, data_dir: Path) -> Path:
+    """One file per frame plus a small index.json manifest pointing at them."""
+    frame_dir = data_dir / FRAME_DIR
+    frame_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = {key: value for key, value in report.items() if key != "frames"}
+    manifest["frames"] = {}
+    for key, frame in report["frames"].items():
+        name = f"{FRAME_DIR}/{key}.json"
+        size = write_json(data_dir / name, {"frame": key, "updatedAt": report["updatedAt"], **frame})
+        manifest["frames"][key] = {
+            "label": frame["label"],
+            "interval": frame["interval"],
+            "latest": frame["latest"],
+            "file": name,
+            "bytes": size,
+        }
+        print(f"Wrote {name} ({size} bytes)")
+
+    # The manifest goes last so it never points at a frame file that is not written yet.
+    out_file = data_dir / "index.json"
+    write_json(out_file, manifest)
+    return out_file
+
+
 def main():
     report = build_report()
 
     base_dir = Path(__file__).resolve().parent.parent
     data_dir = base_dir / "data"
     data_dir.mkdir(parents=True, exist_ok=True)
-    out_file = data_dir / "latest.json"
-
-    with open(out_file, "w", encoding="utf-8") as f:
-        json.dump(report, f, ensure_ascii=False, indent=2)
+    out_file = write_report(report, data_dir)
 
     print(f"Updated {out_file}")
 
@@ -1,4 +1,8 @@
 const SUBSCRIBER_KEY = 'line-subscribers';
+// Change log behind GET /subscribers?since=<version>: { version, floor, log: [{ v, op, id }] }.
+// Deltas can be served for any since >= floor; older cursors get the full list.
+const SUBSCRIBER_META_KEY = 'line-subscribers-meta';
+const SUBSCRIBER_LOG_LIMIT = 500;
 const COMMAND_QUEUE_KEY = 'line-command-queue';
 const COMMAND_PREFIX = '#oc';
 
@@ -100,15 +104,84 @@ async function saveSubscribers(env, ids) {
   await env.SUBSCRIBERS.put(SUBSCRIBER_KEY, JSON.stringify(ids));
 }
 
+async function loadSubscriberMeta(env) {
+  const raw = await env.SUBSCRIBERS.get(SUBSCRIBER_META_KEY);
+  try {
+    const parsed = raw ? JSON.parse(raw) : null;
+    if (parsed && Number.isInteger(parsed.version) && Array.isArray(parsed.log)) return parsed;
+  } catch (err) {
+    console.error('Failed to parse subscriber meta', err);
+  }
+  return { version: 0, floor: 0, log: [] };
+}
+
+async function recordSubscriberChange(env, op, userId) {
+  const meta = await loadSubscriberMeta(env);
+  meta.version += 1;
+  if (op === 'reset') {
+    meta.floor = meta.version;
+    meta.log = [];
+  } else {
+    meta.log.push({ v: meta.version, op, id: userId });
+    if (meta.log.length > SUBSCRIBER_LOG_LIMIT) {
+      meta.log = meta.log.slice(-SUBSCRIBER_LOG_LIMIT);
+      meta.floor = meta.log[0].v - 1;
+    }
+  }
+  await env.SUBSCRIBERS.put(SUBSCRIBER_META_KEY, JSON.stringify(meta));
+}
+
 async function addSubscriber(env, userId) {
   if (!userId) return;
   const ids = await loadSubscribers(env);
   if (!ids.includes(userId)) {
     ids.push(userId);
     await saveSubscribers(env, ids);
+    await recordSubscriberChange(env, 'add', userId);
+  }
+}
+
+async function removeSubscriber(env, userId) {
+  if (!userId) return;
+  const ids = await loadSubscribers(env);
+  if (ids.includes(userId)) {
+    await saveSubscribers(env, ids.filter(id => id !== userId));
+    await recordSubscriberChange(env, 'remove', userId);
   }
 }
 
+// SHA-256 of the sorted ids, one per line. Delta replies carry it so a client whose
+// list drifted (a log entry lost to a racing KV write) can tell and refetch in full.
+async function subscriberDigest(ids) {
+  const bytes = new TextEncoder().encode([...ids].sort().join('\n'));
+  const hash = await crypto.subtle.digest('SHA-256', bytes);
+  return [...new Uint8Array(hash)].map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function handleSubscribersGet(request, env) {
+  const meta = await loadSubscriberMeta(env);
+  const etag = `"v${meta.version}"`;
+  const headers = { 'content-type': 'application/json', etag, 'cache-control': 'no-cache' };
+  if (request.headers.get('if-none-match') === etag) {
+    return new Response(null, { status: 304, headers });
+  }
+  const sinceParam = new URL(request.url).searchParams.get('since');
+  const since = sinceParam === null ? NaN : Number(sinceParam);
+  if (Number.isInteger(since) && since >= meta.floor && since <= meta.version) {
+    // Net effect of the changes after `since`: the last operation per id wins.
+    const last = new Map();
+    for (const change of meta.log) {
+      if (change.v > since) last.set(change.id, change.op);
+    }
+    const added = [...last].filter(([, op]) => op === 'add').map(([id]) => id);
+    const removed = [...last].filter(([, op]) => op === 'remove').map(([id]) => id);
+    const digest = await subscriberDigest(await loadSubscribers(env));
+    return new Response(JSON.stringify({ version: meta.version, added, removed, digest }), { status: 200, headers });
+  }
+  const ids = await loadSubscribers(env);
+  return new Response(JSON.stringify({ version: meta.version, ids }), { status: 200, headers });
+}
+
 async function loadCommandQueue(env) {
   const raw = await env.LINE_COMMANDS.get(COMMAND_QUEUE_KEY);
   if (!raw) return [];
@@ -170,14 +243,11 @@ export default {
     }
     if (url.pathname === '/subscribers') {
       if (request.method === 'GET') {
-        const ids = await loadSubscribers(env);
-        return new Response(JSON.stringify({ ids }), {
-          status: 200,
-          headers: { 'content-type': 'application/json' }
-        });
+        return handleSubscribersGet(request, env);
       }
       if (request.method === 'DELETE') {
         await saveSubscribers(env, []);
+        await recordSubscriberChange(env, 'reset');
         return new Response(JSON.stringify({ ok: true }), {
           status: 200,
           headers: { 'content-type': 'application/json' }
@@ -230,6 +300,10 @@ export default {
     try {
       const accessToken = await getAccessToken(env);
       for (const evt of body.events || []) {
+        if (evt?.type === 'unfollow') {
+          await removeSubscriber(env, evt.source?.userId);
+          continue;
+        }
         if (evt?.source?.userId) {
           await addSubscriber(env, evt.source.userId);
         }
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Compare the BeautifulSoup headline scrape with the streaming anchor parser.
+
+Reports parse time and peak traced memory for each, and fails if their
+headlines differ. By default it runs on the cnyes pages in
+benchmarks/fixtures/, each with its job's link keywords. Those pages were
+rebuilt offline from the headlines the jobs scraped on 2026-02-26 (in
+data/tw_news.json / data/us_news.json), in cnyes' Next.js markup. Each one
+yields exactly the recorded headlines. Replace them with live captures using
+--refresh-fixtures. Other saved pages can be passed with --html; a synthetic
+page is available with --synthetic.
+
+Usage: python benchmarks/bench_headline_parse.py [--html page.html ...] [--synthetic] [--repeat 5] [--refresh-fixtures]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from headline_parser import extract_headlines  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+TW_KEYWORDS = ("news", "topic", "twstock")
+US_KEYWORDS = ("news", "topic", "usstock")
+# fixture file -> (live page, link keywords of the job that scrapes it)
+FIXTURES = {
+    "cnyes_tw_stock_news.html": ("https://news.cnyes.com/news/cat/tw_stock_news", TW_KEYWORDS),
+    "cnyes_usstock.html": ("https://www.cnyes.com/usstock", US_KEYWORDS),
+}
+
+
+def soup_headlines(html: str, keywords=TW_KEYWORDS) -> list[dict]:
+    """The previous update_tw_news.fetch_headlines body, kept as the reference."""
+    soup = BeautifulSoup(html, "html.parser")
+    headlines = []
+    for a in soup.select("a"):
+        text = " ".join(a.get_text(strip=True).split())
+        href = a.get("href") or ""
+        if not text or len(text) < 8:
+            continue
+        if not href:
+            continue
+        if href.startswith("/"):
+            href = "https://www.cnyes.com" + href
+        if any(k in href for k in keywords):
+            headlines.append({"title": text, "url": href})
+    seen = set()
+    uniq = []
+    for h in headlines:
+        key = (h["title"], h["url"])
+        if key in seen:
+            continue
+        seen.add(key)
+        uniq.append(h)
+    return uniq[:12]
+
+
+def synthetic_page(seed: int = 11, articles: int = 400) -> str:
+    """Roughly cnyes-sized: heavy head/scripts, nav links, then article list items."""
+    rng = random.Random(seed)
+    words = ["台積電", "外資", "法說會", "營收", "ETF", "半導體", "AI", "伺服器", "降息", "匯率", "航運", "金融股"]
+    parts = ["<!DOCTYPE html><html><head><meta charset='utf-8'><title>台股新聞 | 鉅亨網</title>"]
+    parts += [f"<script>window.__STATE_{i}__={{'k':'{'x' * 2000}'}};</script>" for i in range(40)]
+    parts.append("<style>" + ".c{color:red}" * 3000 + "</style></head><body><header><nav>")
+    parts += [f"<a href='/{p}'>{p}</a>" for p in ("home", "twstock", "usstock", "forex", "crypto", "fund")]
+    parts.append("</nav></header><main><section>")
+    for i in range(articles):
+        title = "".join(rng.choice(words) for _ in range(rng.randint(4, 9)))
+        parts.append(
+            f"<div class='item'><a href='/news/id/{5_800_000 + i}' class='t'>"
+            f"<span class='tag'>台股</span><h3>{title} &amp; 第{i}則</h3></a>"
+            f"<time>2026-03-05 1{i % 10}:00</time><p>{'內文摘要' * 30}</p>"
+            f"<a href='/news/id/{5_800_000 + i}'>{title} &amp; 第{i}則</a></div>"
+        )
+    parts.append("</section></main><footer>" + "<a href='https://example.com/ad'>廣告連結廣告連結</a>" * 200)
+    parts.append("</footer></body></html>")
+    return "".join(parts)
+
+
+def measure(fn, html: str, repeat: int) -> tuple[float, int, list]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def refresh_fixtures() -> None:
+    import requests
+
+    for name, (url, _) in FIXTURES.items():
+        resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=20)
+        resp.raise_for_status()
+        resp.encoding = resp.encoding or "utf-8"
+        (FIXTURES_DIR / name).write_text(resp.text, encoding="utf-8")
+        print(f"Saved {url} to {FIXTURES_DIR / name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--html", nargs="*", default=[], help="saved pages, parsed with the TW job's keywords")
+    parser.add_argument("--synthetic", action="store_true", help="also run the generated cnyes-shaped page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--refresh-fixtures", action="store_true", help="download the live cnyes pages into fixtures/")
+    args = parser.parse_args()
+
+    if args.refresh_fixtures:
+        refresh_fixtures()
+
+    if args.html:
+        pages = [(path, Path(path).read_text(encoding="utf-8", errors="ignore"), TW_KEYWORDS) for path in args.html]
+    else:
+        pages = [
+            (name, (FIXTURES_DIR / name).read_text(encoding="utf-8"), keywords)
+            for name, (_, keywords) in FIXTURES.items()
+        ]
+    if args.synthetic:
+        pages.append(("synthetic", synthetic_page(), TW_KEYWORDS))
+
+    failed = False
+    for name, html, keywords in pages:
+        soup_time, soup_peak, soup_out = measure(lambda h: soup_headlines(h, keywords), html, args.repeat)
+        fast_time, fast_peak, fast_out = measure(lambda h: extract_headlines(h, keywords), html, args.repeat)
+        print(f"{name}: {len(html) / 1024:.0f} KiB, {len(soup_out)} headlines")
+        print(f"  BeautifulSoup  : {soup_time * 1000:8.2f} ms  peak {soup_peak / 1024:8.0f} KiB")
+        print(
+            f"  anchor stream  : {fast_time * 1000:8.2f} ms  peak {fast_peak / 1024:8.0f} KiB"
+            f"  ({soup_time / fast_time:.1f}x faster)"
+        )
+        if not soup_out:
+            failed = True
+            print("  NO HEADLINES: the page no longer has qualifying links")
+        if soup_out != fast_out:
+            failed = True
+            print(f"  MISMATCH:\n    {soup_out}\n    {fast_out}")
+    if failed:
+        raise SystemExit(1)
+    print("outputs identical")
+
+
+if __name__ == "__main__":
+    main()
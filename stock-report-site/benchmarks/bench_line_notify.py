@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Per-message LINE send latency: notify_line.py subprocess vs the in-process client.
+
+Runs against a local stand-in for the LINE API and the subscriber worker.
+The stand-in adds --latency to every request and --connect to every new
+connection, which stands in for a TLS handshake. The modes are:
+  subprocess-cold  a new interpreter per send, no token or subscriber cache (the old path)
+  subprocess-warm  a new interpreter per send, token and subscribers from the disk caches
+  in-process       notify_line.send_line on one pooled client
+
+Usage: python benchmarks/bench_line_notify.py [--sends 5] [--subscribers 1200] [--latency 0.03] [--connect 0.06]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+def make_handler(subscribers: int, latency: float, connect: float, counts: dict):
+    ids = json.dumps({"ids": [f"U{i:032x}" for i in range(subscribers)]}).encode()
+
+    class StandInLine(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            counts["connections"] += 1
+            time.sleep(connect)
+
+        def _reply(self, body: bytes):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            counts["requests"] += 1
+            self._reply(ids)
+
+        def do_POST(self):
+            counts["requests"] += 1
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.path.endswith("/accessToken"):
+                self._reply(json.dumps({"access_token": "stand-in", "expires_in": 2592000}).encode())
+            else:
+                self._reply(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    return StandInLine
+
+
+def timed(label: str, sends: int, send, counts: dict) -> None:
+    counts.update(connections=0, requests=0)
+    started = time.perf_counter()
+    for i in range(sends):
+        send(f"benchmark message {i}")
+    per_send = (time.perf_counter() - started) / sends * 1000
+    print(
+        f"{label:<16} {per_send:8.1f} ms/send   "
+        f"{counts['requests'] / sends:5.1f} requests/send   {counts['connections'] / sends:5.1f} connections/send"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sends", type=int, default=5, help="messages per mode, e.g. a worker poll with several commands")
+    parser.add_argument("--subscribers", type=int, default=1200)
+    parser.add_argument("--latency", type=float, default=0.03, help="simulated round trip per request (s)")
+    parser.add_argument("--connect", type=float, default=0.06, help="simulated handshake per new connection (s)")
+    args = parser.parse_args()
+
+    counts = {"connections": 0, "requests": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.subscribers, args.latency, args.connect, counts))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    cache_dir = Path(tempfile.mkdtemp())
+    token_cache = cache_dir / "line_token.json"
+    subscriber_cache = cache_dir / "line_subscribers.json"
+    os.environ.update(
+        LINE_API_BASE=base,
+        LINE_SUBSCRIBERS_URL=f"{base}/subscribers",
+        LINE_TOKEN_CACHE=str(token_cache),
+        LINE_SUBSCRIBER_CACHE=str(subscriber_cache),
+        LINE_CHANNEL_ID="bench",
+        LINE_CHANNEL_SECRET="bench",
+        LINE_USER_ID="U-fallback",
+    )
+    print(
+        f"{args.subscribers} subscribers, {args.sends} sends per mode, "
+        f"{args.latency * 1000:.0f} ms/request, {args.connect * 1000:.0f} ms/connection"
+    )
+
+    def shell_out(message: str, cold: bool) -> None:
+        if cold:
+            token_cache.unlink(missing_ok=True)
+            subscriber_cache.unlink(missing_ok=True)
+        subprocess.run([sys.executable, str(SCRIPTS_DIR / "notify_line.py"), message], check=True, stdout=subprocess.DEVNULL)
+
+    timed("subprocess-cold", args.sends, lambda m: shell_out(m, cold=True), counts)
+    timed("subprocess-warm", args.sends, lambda m: shell_out(m, cold=False), counts)
+
+    import notify_line  # imported after the environment points it at the stand-in
+
+    timed("in-process", args.sends, notify_line.send_line, counts)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
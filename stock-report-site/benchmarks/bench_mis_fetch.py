@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Wall time for fetching a large TW watchlist against a local stand-in MIS server.
+
+Usage: python benchmarks/bench_mis_fetch.py [--symbols 2000] [--latency 0.15]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+import update_report  # noqa: E402
+
+
+def make_handler(latency: float):
+    class StandInMIS(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            channels = query.get("ex_ch", [""])[0].split("|")
+            time.sleep(latency)
+            msg = []
+            for channel in channels:
+                _, _, ch = channel.partition("_")
+                msg.append({"ch": ch, "c": ch.split(".")[0], "z": "101.50", "y": "100.00", "v": "1234",
+                            "tv": "5", "d": "20260305", "t": "10:15:30"})
+            body = json.dumps({"msgArray": msg, "rtcode": "0000"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StandInMIS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.15, help="Simulated server latency per request (s)")
+    parser.add_argument("--workers", type=int, default=update_report.DEFAULT_FETCH_WORKERS)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    update_report.MIS_URL = f"http://127.0.0.1:{server.server_address[1]}/stock/api/getStockInfo.jsp"
+
+    channels = [f"tse_{1000 + i}.tw" for i in range(args.symbols)]
+    chunks = update_report.chunk_channels(channels)
+    print(f"{args.symbols} symbols -> {len(chunks)} chunks, {args.latency * 1000:.0f} ms simulated latency")
+
+    session = update_report.create_mis_session(args.workers)
+    for workers in (1, args.workers):
+        started = time.perf_counter()
+        quotes = update_report.fetch_mis_quotes_chunked(channels, session=session, max_workers=workers)
+        elapsed = time.perf_counter() - started
+        print(f"workers={workers:<3} quotes={len(quotes):<5} wall={elapsed:.3f}s")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
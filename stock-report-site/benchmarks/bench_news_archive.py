@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Time headline archive searches over a large synthetic archive.
+
+Usage: python benchmarks/bench_news_archive.py [--rows 300000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from news_archive import NewsArchive  # noqa: E402
+
+SOURCES = ["tw_news", "us_news", "coffee_news", "interesting_stories"]
+# Named terms appear in a few percent of headlines, like a hot ticker would.
+HOT_ZH = ["台積電", "外資", "法說會", "降息"]
+HOT_EN = ["arabica", "earnings", "rates"]
+
+
+def vocabulary(rng: random.Random) -> tuple[list[str], list[str]]:
+    zh = ["".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(2, 3))) for _ in range(5000)]
+    en = ["".join(chr(rng.randint(97, 122)) for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    return zh, en
+
+
+def fill(archive: NewsArchive, rows: int, days: int = 365, seed: int = 5) -> None:
+    rng = random.Random(seed)
+    zh_words, en_words = vocabulary(rng)
+    now = time.time()
+    batch = 20_000
+    for start in range(0, rows, batch):
+        # Upserts are grouped into a few hundred arrival times per batch.
+        groups: dict[tuple[str, int], list[dict]] = {}
+        for i in range(start, min(rows, start + batch)):
+            zh = rng.random() < 0.6
+            words = rng.choices(zh_words if zh else en_words, k=rng.randint(4, 9))
+            if rng.random() < 0.03:
+                words[rng.randrange(len(words))] = rng.choice(HOT_ZH if zh else HOT_EN)
+            title = ("" if zh else " ").join(words)
+            key = (rng.choice(SOURCES), rng.randrange(days * 2))
+            groups.setdefault(key, []).append(
+                {"title": f"{title} {i}", "url": f"https://example.com/a/{i}?utm_source=x", "lang": "zh" if zh else "en"}
+            )
+        for (source, slot), items in groups.items():
+            archive.upsert(items, source, seen_at=now - slot * 43200 - rng.random() * 43200)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = NewsArchive(Path(tmp) / "archive.sqlite")
+        started = time.perf_counter()
+        fill(archive, args.rows)
+        print(f"filled {args.rows} rows in {time.perf_counter() - started:.1f}s")
+        for text, days in [("台積電", 30), ("台積電", None), ("arabica", 30), ("外資", 30), ("earnings", 7)]:
+            best = float("inf")
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                results = archive.search(text, days=days, limit=50)
+                best = min(best, time.perf_counter() - started)
+            window = f"{days:.0f}d" if days else "all"
+            print(f"search {text!r:18} {window:>4}: {best * 1000:7.2f} ms  ({len(results)} results)")
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Compare per-entry Decimal build_quote with the NumPy QuoteBatch path.
+
+Usage: python benchmarks/bench_quote_parse.py [--entries 5000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from quote_batch import QuoteBatch  # noqa: E402
+from update_report import build_quote  # noqa: E402
+
+
+def synthetic_entries(count: int, seed: int = 7) -> list[dict | None]:
+    rng = random.Random(seed)
+    entries: list[dict | None] = []
+    for i in range(count):
+        if i % 97 == 0:
+            entries.append(None)
+            continue
+        prev = rng.choice([rng.randint(1000, 99999) / 100, rng.randint(100, 5000) * 0.05])
+        last = max(0.01, prev + rng.randint(-500, 500) / 100)
+        entry = {
+            "ch": f"{1000 + i}.tw",
+            "z": f"{last:.4f}" if i % 13 else "-",
+            "y": f"{prev:.4f}",
+            "v": str(rng.randint(0, 500000)),
+            "tv": str(rng.randint(0, 500)),
+            "d": "20260305",
+            "t": f"{9 + i % 5:02d}:{i % 60:02d}:{(i * 7) % 60:02d}",
+        }
+        if i % 5:
+            tick = 0.05 if prev < 100 else 0.5
+            entry["b"] = "_".join(f"{last - tick * k:.4f}" for k in range(5)) + "_"
+            entry["a"] = "_".join(f"{last + tick * (k + 1):.4f}" for k in range(5)) + "_"
+            entry["g"] = "_".join(str(rng.randint(1, 900)) for _ in range(5)) + "_"
+            entry["f"] = "_".join(str(rng.randint(1, 900)) for _ in range(5)) + "_"
+        if i % 211 == 0:
+            entry["t"] = ""
+        entries.append(entry)
+    return entries
+
+
+def best_of(repeat: int, fn) -> tuple[float, object]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    entries = synthetic_entries(args.entries)
+    loop_time, loop_out = best_of(args.repeat, lambda: [build_quote(e) for e in entries])
+    batch_time, batch_out = best_of(args.repeat, lambda: QuoteBatch.from_entries(entries).to_dicts())
+
+    # build_quote has no order book; compare everything else.
+    without_depth = [{k: v for k, v in q.items() if k != "depth"} for q in batch_out]
+    depth_rows = sum(1 for q in batch_out if "depth" in q)
+    mismatches = [i for i, (a, b) in enumerate(zip(loop_out, without_depth)) if a != b]
+    print(f"entries={args.entries} (with best-five depth: {depth_rows})")
+    print(f"build_quote loop : {loop_time * 1000:8.2f} ms")
+    print(f"QuoteBatch       : {batch_time * 1000:8.2f} ms  ({loop_time / batch_time:.1f}x)")
+    if mismatches:
+        i = mismatches[0]
+        print(f"MISMATCH in {len(mismatches)} rows; first at {i}:\n  {loop_out[i]}\n  {without_depth[i]}")
+        raise SystemExit(1)
+    print("outputs identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Optional article-body summaries for the news jobs.
+
+`article_summaries(urls)` fetches the linked articles concurrently (under one
+deadline, via fetch_pool) and pulls the main text out of the HTML. It then
+drops repeated sentences, scores the rest by TF-IDF cosine similarity to the
+article's centroid, keeps the best few in their original order, and returns
+{url: summary}.
+Extraction and scoring run in a process pool when there is enough work to pay
+for it.
+
+Results are cached in data/cache/article_summaries.json, keyed by a hash of
+the canonical URL. An article that was summarized once is never fetched or
+scored again. A page that yielded no usable text is cached as "" so it is
+skipped too. Network failures are not cached, so they are retried on the
+next run.
+
+The stage is off unless NEWS_ARTICLE_SUMMARIES=1. It uses only the standard
+library. To check it offline against saved pages:
+  python scripts/article_summary.py saved-article.html [...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable
+from urllib.request import Request, urlopen
+
+from fetch_pool import fetch_in_order
+from news_urls import canonical_url
+
+CACHE_FILE = Path(__file__).resolve().parent.parent / "data" / "cache" / "article_summaries.json"
+ENV_FLAG = "NEWS_ARTICLE_SUMMARIES"
+REQUEST_TIMEOUT = 15
+MAX_WORKERS = 6
+FETCH_DEADLINE = 40
+MAX_BODY_BYTES = 2 * 1024 * 1024
+CACHE_MAX_AGE = 60 * 86400
+# Below this many pages the pool's start-up cost outweighs the scoring work.
+POOL_MIN_PAGES = 4
+MIN_BODY_CHARS = 120
+MIN_PARAGRAPH_CHARS = 20
+MAX_SENTENCES = 3
+MAX_SUMMARY_CHARS = 300
+# Sentences sharing at least this share of their terms count as repeats (e.g. a lead
+# restated in a photo caption or pull quote); only the first is scored.
+SENTENCE_DUP_JACCARD = 0.7
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "nav", "header", "footer", "aside", "form", "figcaption"}
+BLOCK_TAGS = {
+    "p", "div", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6", "br",
+    "article", "section", "blockquote", "td", "tr", "table", "figure", "main",
+}
+SENTENCE_RE = re.compile(r"[^。！？!?；]+[。！？!?；]+[」』”\"]?|[^。！？!?；]+$")
+LATIN_SENTENCE_RE = re.compile(r"(?<=[.!?])[\"”']?\s+(?=[A-Z0-9\"“])")
+TOKEN_RE = re.compile(r"[a-z0-9]+|[㐀-鿿]+")
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "with", "is", "are", "was", "were",
+    "be", "been", "it", "its", "that", "this", "as", "at", "by", "from", "has", "have", "had", "but",
+    "not", "he", "she", "they", "we", "you", "i", "his", "her", "their", "said", "will", "would",
+}
+
+
+def enabled() -> bool:
+    return os.environ.get(ENV_FLAG, "").strip() not in {"", "0"}
+
+
+class _TextParser(HTMLParser):
+    """Collects text blocks, noting which came from <p> and from inside <article>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: list[tuple[str, bool, bool]] = []
+        self._buf: list[str] = []
+        self._skip = 0
+        self._article = 0
+        self._para = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag == "p":
+                self._para += 1
+            elif tag == "article":
+                self._article += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag == "p":
+                self._para = max(0, self._para - 1)
+            elif tag == "article":
+                self._article = max(0, self._article - 1)
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._buf.append(data)
+
+    def _flush(self):
+        text = " ".join("".join(self._buf).split())
+        self._buf.clear()
+        if text:
+            self.blocks.append((text, self._para > 0, self._article > 0))
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def extract_main_text(html: str) -> str:
+    """Body paragraphs of an article page, preferring <p> text inside <article>."""
+    parser = _TextParser()
+    parser.feed(html)
+    parser.close()
+    paragraphs = [(text, in_article) for text, is_para, in_article in parser.blocks if is_para and len(text) >= MIN_PARAGRAPH_CHARS]
+    if any(in_article for _, in_article in paragraphs):
+        paragraphs = [p for p in paragraphs if p[1]]
+    body = "\n".join(text for text, _ in paragraphs)
+    if len(body) < MIN_BODY_CHARS:
+        # Sites that lay articles out in bare <div>s: take the longer text blocks instead.
+        body = "\n".join(text for text, _, _ in parser.blocks if len(text) >= 2 * MIN_PARAGRAPH_CHARS)
+    return body if len(body) >= MIN_BODY_CHARS else ""
+
+
+def split_sentences(text: str) -> list[str]:
+    sentences = []
+    for line in text.split("\n"):
+        for part in SENTENCE_RE.findall(line):
+            sentences.extend(s.strip() for s in LATIN_SENTENCE_RE.split(part))
+    return [s for s in sentences if 10 <= len(s) <= 400]
+
+
+def tokens(sentence: str) -> list[str]:
+    out = []
+    for run in TOKEN_RE.findall(sentence.lower()):
+        if run[0] < "㐀":
+            if run not in STOPWORDS and len(run) > 1:
+                out.append(run)
+        elif len(run) == 1:
+            out.append(run)
+        else:
+            # Chinese has no word breaks; character bigrams stand in for words.
+            out.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return out
+
+
+def distinct_sentences(sentences: list[str]) -> list[str]:
+    """Sentences in order, without exact or near repeats of an earlier one."""
+    kept: list[str] = []
+    kept_terms: list[set[str]] = []
+    for sentence in sentences:
+        terms = set(tokens(sentence)) or {" ".join(sentence.lower().split())}
+        if any(len(terms & other) >= SENTENCE_DUP_JACCARD * len(terms | other) for other in kept_terms):
+            continue
+        kept.append(sentence)
+        kept_terms.append(terms)
+    return kept
+
+
+def summarize_text(text: str, max_sentences: int = MAX_SENTENCES, max_chars: int = MAX_SUMMARY_CHARS) -> str:
+    """Top sentences by TF-IDF similarity to the whole text, in their original order."""
+    sentences = distinct_sentences(split_sentences(text))
+    if len(sentences) <= 1:
+        return sentences[0][:max_chars] if sentences else ""
+    counts = [Counter(tokens(s)) for s in sentences]
+    df = Counter(term for c in counts for term in c)
+    n = len(sentences)
+    idf = {term: math.log((1 + n) / (1 + d)) + 1 for term, d in df.items()}
+    vectors = [{term: tf * idf[term] for term, tf in c.items()} for c in counts]
+    centroid: Counter = Counter()
+    for vec in vectors:
+        centroid.update(vec)
+    centroid_norm = math.sqrt(sum(v * v for v in centroid.values())) or 1.0
+
+    scores = []
+    for pos, vec in enumerate(vectors):
+        norm = math.sqrt(sum(v * v for v in vec.values()))
+        score = sum(w * centroid[t] for t, w in vec.items()) / (norm * centroid_norm) if norm else 0.0
+        # News puts the gist up front; a mild lead bias breaks near-ties that way.
+        scores.append(score * (1.2 if pos < 2 else 1.0))
+
+    chosen, used = [], 0
+    for pos in sorted(range(n), key=lambda i: scores[i], reverse=True):
+        if len(chosen) >= max_sentences:
+            break
+        if used + len(sentences[pos]) > max_chars and chosen:
+            continue
+        chosen.append(pos)
+        used += len(sentences[pos])
+    parts = [sentences[i] for i in sorted(chosen)]
+    summary = "".join(p if p[-1] in "。！？；」』”" else p + " " for p in parts).strip()
+    return summary if len(summary) <= max_chars else summary[:max_chars] + "…"
+
+
+def summarize_html(html: str) -> str:
+    body = extract_main_text(html)
+    return summarize_text(body) if body else ""
+
+
+def summarize_pages(pages: list[str]) -> list[str]:
+    """summarize_html over many pages, spread across processes when worthwhile."""
+    if len(pages) < POOL_MIN_PAGES:
+        return [summarize_html(page) for page in pages]
+    try:
+        with ProcessPoolExecutor(max_workers=min(len(pages), os.cpu_count() or 1)) as pool:
+            return list(pool.map(summarize_html, pages, chunksize=2))
+    except (OSError, RuntimeError) as exc:
+        print(f"Warning: process pool unavailable ({exc}); summarizing inline")
+        return [summarize_html(page) for page in pages]
+
+
+def fetch_article(url: str, timeout: float = REQUEST_TIMEOUT) -> str:
+    with urlopen(Request(url, headers={"User-Agent": USER_AGENT}), timeout=timeout) as resp:
+        body = resp.read(MAX_BODY_BYTES)
+        charset = resp.headers.get_content_charset() or "utf-8"
+    return body.decode(charset, errors="ignore")
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(canonical_url(url).encode("utf-8")).hexdigest()[:32]
+
+
+class SummaryCache:
+    def __init__(self, path: Path = CACHE_FILE, max_age: float = CACHE_MAX_AGE):
+        self.path = Path(path)
+        self.max_age = max_age
+        # url key -> {"s": summary, "at": last used}
+        self.entries: dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as exc:
+                print(f"Warning: ignoring unreadable {self.path}: {exc}")
+
+    def get(self, url: str, now: float) -> str | None:
+        entry = self.entries.get(url_key(url))
+        if entry is None:
+            return None
+        entry["at"] = now
+        return entry["s"]
+
+    def put(self, url: str, summary: str, now: float) -> None:
+        self.entries[url_key(url)] = {"s": summary, "at": now}
+
+    def save(self, now: float) -> None:
+        live = {k: v for k, v in self.entries.items() if now - v["at"] <= self.max_age}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(live, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def article_summaries(
+    urls: list[str],
+    cache_path: Path = CACHE_FILE,
+    fetch: Callable[..., str] = fetch_article,
+    deadline: float = FETCH_DEADLINE,
+) -> dict[str, str]:
+    """{url: summary} for every url that has one, from cache or freshly fetched."""
+    now = time.time()
+    cache = SummaryCache(cache_path)
+    out: dict[str, str] = {}
+    missing = []
+    for url in dict.fromkeys(u for u in urls if u):
+        cached = cache.get(url, now)
+        if cached is None:
+            missing.append(url)
+        elif cached:
+            out[url] = cached
+
+    fetched = []
+    if missing:
+        results = fetch_in_order(
+            [partial(fetch, url) for url in missing],
+            request_timeout=REQUEST_TIMEOUT,
+            max_workers=MAX_WORKERS,
+            deadline=deadline,
+        )
+        for url, (html, error) in zip(missing, results):
+            if error is not None:
+                print(f"Warning: article not fetched: {url}: {error}")
+            else:
+                fetched.append((url, html))
+    for (url, _), summary in zip(fetched, summarize_pages([html for _, html in fetched])):
+        cache.put(url, summary, now)
+        if summary:
+            out[url] = summary
+
+    try:
+        cache.save(now)
+    except OSError as exc:
+        print(f"Warning: summary cache not saved: {exc}")
+    print(f"Article summaries: {len(out)} of {len(urls)} ({len(fetched)} fetched)")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the extractive summary of saved article pages.")
+    parser.add_argument("html", nargs="+", type=Path)
+    parser.add_argument("--body", action="store_true", help="also print the extracted main text")
+    args = parser.parse_args()
+    pages = [path.read_text(encoding="utf-8", errors="ignore") for path in args.html]
+    for path, page, summary in zip(args.html, pages, summarize_pages(pages)):
+        print(f"== {path}")
+        if args.body:
+            print(extract_main_text(page), end="\n\n")
+        print(summary or "(no article text found)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
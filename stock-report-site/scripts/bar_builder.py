@@ -0,0 +1,111 @@
+"""Streaming 1-minute / 5-minute OHLCV bars built from TW ticks.
+
+Each tick updates the open bar for every interval in O(1). Volume comes
+from the delta of MIS's cumulative volume (`v`), so missed polls do not
+lose volume. When a tick falls into a new bucket, the previous bar is
+complete and is written to the tick store.
+"""
+
+from __future__ import annotations
+
+from tick_store import Bar, Tick, TickStore
+from tw_calendar import SESSION_OPEN
+
+BAR_INTERVALS = (60, 300)
+INTERVAL_LABELS = {60: "1m", 300: "5m"}
+
+
+class BarBuilder:
+    def __init__(self, intervals: tuple[int, ...] = BAR_INTERVALS):
+        self.intervals = intervals
+        # (channel, interval) -> [start, open, high, low, close, volume]
+        self._open: dict[tuple[str, int], list] = {}
+        self._volume: dict[str, int] = {}
+
+    def update(self, channel: str, ts: int, price: float, cum_volume: int) -> list[tuple[int, Bar]]:
+        previous = self._volume.get(channel)
+        if previous is None:
+            delta = 0
+        elif cum_volume >= previous:
+            delta = cum_volume - previous
+        else:
+            # Cumulative volume restarts at the next session's open.
+            delta = cum_volume
+        self._volume[channel] = cum_volume
+
+        completed = []
+        for interval in self.intervals:
+            start = ts - ts % interval
+            key = (channel, interval)
+            bar = self._open.get(key)
+            if bar is None or start > bar[0]:
+                if bar is not None:
+                    completed.append((interval, Bar(*bar)))
+                self._open[key] = [start, price, price, price, price, delta]
+                continue
+            if price > bar[2]:
+                bar[2] = price
+            if price < bar[3]:
+                bar[3] = price
+            bar[4] = price
+            bar[5] += delta
+        return completed
+
+    def ingest(self, store: TickStore, channel: str, day: str, tick: Tick) -> list[tuple[int, Bar]]:
+        """Feed a tick the store just appended and persist any bars it completes."""
+        if channel not in self._volume:
+            self._seed(store, channel, day, tick)
+        completed = self.update(channel, tick.ts, tick.last, tick.volume)
+        for interval, bar in completed:
+            store.append_bar(channel, interval, bar)
+        return completed
+
+    def current(self, channel: str) -> dict[int, Bar]:
+        return {
+            interval: Bar(*self._open[(channel, interval)])
+            for interval in self.intervals
+            if (channel, interval) in self._open
+        }
+
+    def flush(self, store: TickStore) -> int:
+        """Persist every open bar, e.g. once the session has closed.
+
+        A bar whose bucket is already stored is skipped, so repeated one-shot
+        runs after the close do not write the final bar twice.
+        """
+        flushed = 0
+        for (channel, interval), values in self._open.items():
+            bar = Bar(*values)
+            stored = store.recent_bars(bar.time.strftime("%Y%m%d"), channel, interval, 1)
+            if stored and stored[-1].start >= bar.start:
+                continue
+            store.append_bar(channel, interval, bar)
+            flushed += 1
+        self._open.clear()
+        self._volume.clear()
+        return flushed
+
+    def _seed(self, store: TickStore, channel: str, day: str, tick: Tick) -> None:
+        # A fresh process resumes mid-bar: replay the stored ticks of the bucket the
+        # previous tick fell in (the new tick is already the last record) so its
+        # open/high/low/volume carry over. Bars completed during the replay were written
+        # by the earlier run, so they are discarded.
+        total = store.count(day, channel)
+        previous = store.tick_at(day, channel, total - 2) if total >= 2 else None
+        widest = max(self.intervals)
+        bucket = (previous or tick).ts - (previous or tick).ts % widest
+        first = store.index_of(day, channel, bucket)
+
+        before = store.tick_at(day, channel, first - 1) if first > 0 else None
+        if before is not None:
+            self._volume[channel] = before.volume
+        else:
+            # Nothing earlier today: volume so far belongs to this bucket only if it is the
+            # opening one; otherwise we cannot tell when it traded.
+            opened = tick.time.replace(hour=SESSION_OPEN.hour, minute=SESSION_OPEN.minute, second=0)
+            self._volume[channel] = 0 if bucket <= opened.timestamp() else None
+
+        for past in store.ticks_between(day, channel, first, total - 1):
+            self.update(channel, past.ts, past.last, past.volume)
+        if self._volume.get(channel) is None:
+            self._volume[channel] = tick.volume
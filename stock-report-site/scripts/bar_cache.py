@@ -0,0 +1,189 @@
+"""On-disk OHLCV bar cache with delta fetching for the yfinance reports.
+
+Bars live in one SQLite table keyed by (symbol, interval, ts). A run asks
+`fetch_start` where to resume. When the cache already covers the window,
+that is the last cached bar: it is fetched again so a restated, still-forming
+bar gets overwritten. When the cache is empty or stale, it returns None and
+the caller downloads the whole window; the same happens when the cache
+does not reach back to the window start. Rows that fall out of every window
+are pruned on write.
+
+Daily and coarser bars are keyed by their trading date at 00:00 UTC: the bulk
+download returns them tz-naive, the per-ticker fallback in exchange time, and
+both must land on the same row.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+# Typical bar spacing; a cache whose newest bar is older than the window start plus
+# a few bars is treated as stale and refetched in full so no gap is left behind.
+INTERVAL_SPAN = {
+    "15m": pd.Timedelta(minutes=15),
+    "1h": pd.Timedelta(hours=1),
+    "1d": pd.Timedelta(days=1),
+    "1wk": pd.Timedelta(weeks=1),
+    "1mo": pd.Timedelta(days=31),
+}
+DATE_INTERVALS = {"1d", "1wk", "1mo"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID
+"""
+
+
+def bar_index(index, interval: str) -> pd.DatetimeIndex:
+    """UTC timestamps for a frame's index; date-keyed bars keep their exchange-local date."""
+    index = pd.DatetimeIndex(index)
+    if interval in DATE_INTERVALS:
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.normalize().tz_localize("UTC")
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    return index.tz_convert("UTC")
+
+
+def window_start(period: str, now: pd.Timestamp) -> pd.Timestamp:
+    match = PERIOD_RE.match(period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return now - pd.Timedelta(days=count)
+    if unit == "wk":
+        return now - pd.Timedelta(weeks=count)
+    if unit == "mo":
+        return now - pd.DateOffset(months=count)
+    return now - pd.DateOffset(years=count)
+
+
+class BarCache:
+    def __init__(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def span(self, symbol: str, interval: str) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+        row = self.conn.execute(
+            "SELECT MIN(ts), MAX(ts) FROM bars WHERE symbol = ? AND interval = ?", (symbol, interval)
+        ).fetchone()
+        if not row or row[0] is None:
+            return None
+        return pd.Timestamp(row[0], unit="s", tz="UTC"), pd.Timestamp(row[1], unit="s", tz="UTC")
+
+    def last_timestamp(self, symbol: str, interval: str) -> pd.Timestamp | None:
+        span = self.span(symbol, interval)
+        return span[1] if span else None
+
+    def fetch_start(self, symbol: str, interval: str, period: str, now: pd.Timestamp | None = None) -> pd.Timestamp | None:
+        """Where a delta download should start, or None if the full window is needed."""
+        now = now or pd.Timestamp.now(tz="UTC")
+        span = self.span(symbol, interval)
+        if span is None:
+            return None
+        first, last = span
+        start = window_start(period, now)
+        step = INTERVAL_SPAN.get(interval, pd.Timedelta(0))
+        if last < start + step * 3:
+            return None
+        # A window that grew (or a cache cut short by an earlier failure) needs backfilling.
+        if first > start + step * 5:
+            return None
+        return last
+
+    def store(self, symbol: str, interval: str, frame: pd.DataFrame, keep_since: pd.Timestamp | None = None) -> int:
+        if frame is None or frame.empty:
+            return 0
+        data = frame.reindex(columns=COLUMNS).dropna(subset=["Close"])
+        if data.empty:
+            return 0
+        index = bar_index(data.index, interval)
+        unique = ~index.duplicated(keep="last")
+        data, index = data[unique], index[unique]
+        ts = index.as_unit("s").asi8
+        rows = zip(
+            [symbol] * len(data),
+            [interval] * len(data),
+            ts.tolist(),
+            *(data[col].astype(float).where(data[col].notna(), None).tolist() for col in COLUMNS),
+        )
+        with self.conn:
+            # INSERT OR REPLACE so a re-downloaded last bar overwrites its earlier partial values.
+            self.conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            if interval in DATE_INTERVALS:
+                # Drop rows left at exchange-local times by caches written before date keying.
+                self.conn.execute(
+                    "DELETE FROM bars WHERE symbol = ? AND interval = ? AND ts % 86400 != 0", (symbol, interval)
+                )
+            if keep_since is not None:
+                self.conn.execute(
+                    "DELETE FROM bars WHERE symbol = ? AND interval = ? AND ts < ?",
+                    (symbol, interval, int(keep_since.timestamp())),
+                )
+        return len(data)
+
+    def load(self, symbol: str, interval: str, since: pd.Timestamp | None = None, limit: int | None = None) -> pd.DataFrame:
+        query = "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol = ? AND interval = ?"
+        params: list = [symbol, interval]
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(int(since.timestamp()))
+        query += " ORDER BY ts DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self.conn.execute(query, params).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=COLUMNS)
+        rows.reverse()
+        frame = pd.DataFrame(rows, columns=["ts", *COLUMNS])
+        frame.index = pd.to_datetime(frame.pop("ts"), unit="s", utc=True)
+        if interval in DATE_INTERVALS:
+            # Caches written before date keying can hold one trading day at two times of
+            # day; the date-keyed 00:00 row sorts first and is the one kept.
+            frame.index = frame.index.normalize()
+            frame = frame[~frame.index.duplicated(keep="first")]
+        return frame
+
+
+def cached_history(cache: BarCache, symbol: str, interval: str, period: str, download) -> pd.DataFrame:
+    """Window of `period` bars for symbol, downloading only what the cache lacks.
+
+    `download(start)` must return a yfinance-style frame: bars from `start`
+    when it is a Timestamp, or the full window when it is None.
+    """
+    now = pd.Timestamp.now(tz="UTC")
+    since = window_start(period, now)
+    start = cache.fetch_start(symbol, interval, period, now)
+    try:
+        fresh = download(start)
+    except Exception as exc:
+        print(f"{symbol} {interval} download failed ({exc}); using cached bars")
+        fresh = None
+    written = cache.store(symbol, interval, fresh, keep_since=since)
+    mode = "full" if start is None else f"delta since {start.isoformat()}"
+    print(f"{symbol} {interval}: {written} bars ({mode})")
+    return cache.load(symbol, interval, since=since)
@@ -0,0 +1,55 @@
+"""Run several network fetches at once under one overall deadline.
+
+Used by the Google News jobs, which issue a dozen or more RSS queries per
+run. Results come back in task order, regardless of completion order, so
+downstream dedupe stays deterministic. A fetch that has not finished by the
+deadline is reported as a TimeoutError in its slot.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Sequence
+
+DEFAULT_WORKERS = 6
+DEFAULT_DEADLINE = 45.0
+
+
+def fetch_in_order(
+    tasks: Sequence[Callable[[float], object]],
+    request_timeout: float,
+    max_workers: int = DEFAULT_WORKERS,
+    deadline: float = DEFAULT_DEADLINE,
+) -> list[tuple[object, Exception | None]]:
+    """Call each task with a per-request timeout; returns [(result, error), ...] in task order.
+
+    A task started late gets only the time left before the deadline, so no
+    request outlives the run by more than a connect attempt.
+    """
+    if not tasks:
+        return []
+    ends_at = time.monotonic() + deadline
+
+    def run(task):
+        remaining = ends_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("deadline reached before request started")
+        return task(min(request_timeout, remaining))
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(tasks)))
+    try:
+        futures = [pool.submit(run, task) for task in tasks]
+        wait(futures, timeout=max(0.0, ends_at - time.monotonic()))
+        out = []
+        for future in futures:
+            if not future.done():
+                future.cancel()
+                out.append((None, TimeoutError(f"no response within {deadline:.0f}s deadline")))
+            elif future.exception() is not None:
+                out.append((None, future.exception()))
+            else:
+                out.append((future.result(), None))
+        return out
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,124 @@
+"""Anchor-only, streaming headline extraction for the cnyes news pages.
+
+The old path built a full BeautifulSoup tree and then walked every <a>.
+This one drives the standard library's event parser and only tracks open
+anchors, so no tree is ever built. It feeds the page in chunks and stops
+once `limit` unique qualifying headlines are known. Results match the old
+BeautifulSoup extraction: anchor text is taken as in
+`get_text(strip=True)`, whitespace is collapsed, root-relative links are
+made absolute, and output is in document order with (title, url) dedupe.
+"""
+
+from __future__ import annotations
+
+from html.parser import HTMLParser
+from typing import Sequence
+
+CNYES_ORIGIN = "https://www.cnyes.com"
+CHUNK_SIZE = 32 * 1024
+MIN_TITLE_CHARS = 8
+IGNORED_TEXT_TAGS = {"script", "style", "template"}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+class _AnchorParser(HTMLParser):
+    def __init__(self, keywords: Sequence[str], limit: int):
+        super().__init__(convert_charrefs=True)
+        self.keywords = tuple(keywords)
+        self.limit = limit
+        self.headlines: list[dict] = []
+        self.done = False
+        self._seen: set[tuple[str, str]] = set()
+        # Anchors in start-tag order; each is [href, text pieces, closed].
+        self._slots: list[list] = []
+        # Open elements as (tag, anchor slot or None), only so that an end tag closes
+        # whatever it encloses, as BeautifulSoup does with an unclosed <a>.
+        self._stack: list[tuple[str, list | None]] = []
+        self._open: list[list] = []
+        self._ignored = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        slot = None
+        if tag == "a":
+            slot = [dict(attrs).get("href") or "", [], False]
+            self._slots.append(slot)
+            self._open.append(slot)
+        elif tag in IGNORED_TEXT_TAGS:
+            self._ignored += 1
+        self._stack.append((tag, slot))
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == "a":
+            self._slots.append([dict(attrs).get("href") or "", [], True])
+            self._flush()
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                break
+        else:
+            return
+        closed_anchor = False
+        while len(self._stack) > depth:
+            name, slot = self._stack.pop()
+            if slot is not None:
+                slot[2] = True
+                self._open.remove(slot)
+                closed_anchor = True
+            elif name in IGNORED_TEXT_TAGS:
+                self._ignored -= 1
+        if closed_anchor:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._open or self._ignored:
+            return
+        piece = data.strip()
+        if piece:
+            for slot in self._open:
+                slot[1].append(piece)
+
+    def finish(self) -> None:
+        for slot in self._open:
+            slot[2] = True
+        self._open.clear()
+        self._stack.clear()
+        self._flush()
+
+    def _flush(self) -> None:
+        # Emit closed anchors in start order; an outer anchor still open holds back the rest.
+        while self._slots and self._slots[0][2] and not self.done:
+            href, pieces, _ = self._slots.pop(0)
+            self._accept(href, " ".join("".join(pieces).split()))
+
+    def _accept(self, href: str, text: str) -> None:
+        if not text or len(text) < MIN_TITLE_CHARS or not href:
+            return
+        if href.startswith("/"):
+            href = CNYES_ORIGIN + href
+        if not any(k in href for k in self.keywords):
+            return
+        key = (text, href)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self.headlines.append({"title": text, "url": href})
+        if len(self.headlines) >= self.limit:
+            self.done = True
+
+
+def extract_headlines(html: str, keywords: Sequence[str], limit: int = 12) -> list[dict]:
+    """First `limit` unique headlines whose link contains one of `keywords`."""
+    parser = _AnchorParser(keywords, limit)
+    for start in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[start:start + CHUNK_SIZE])
+        if parser.done:
+            return parser.headlines
+    parser.close()
+    parser.finish()
+    return parser.headlines
@@ -0,0 +1,165 @@
+"""Small on-disk HTTP cache with conditional GET for the news jobs.
+
+Each URL is stored as two files under data/cache/http/: the raw body, and a
+JSON sidecar with its ETag / Last-Modified and timestamps. A fetch sends
+If-None-Match / If-Modified-Since. On a 304 the stored body is reused and
+the response is marked unchanged, so the caller can skip parsing and keep
+its existing JSON. A 200 whose body hashes the same as the stored copy is
+also treated as unchanged.
+
+Entries not used for `ttl` seconds are evicted. If the directory still
+exceeds `max_bytes`, the least recently used entries are dropped. Only the
+standard library is used, because the scheduled GitHub workflow runs these
+scripts without installing requirements.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "http"
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+USER_AGENT = "Mozilla/5.0"
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    body: bytes
+    changed: bool
+    status: int
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding, errors="ignore")
+
+
+def previous_ok(out_file: Path) -> bool:
+    """True if out_file holds a successful earlier run that can be kept as is."""
+    try:
+        return bool(json.loads(Path(out_file).read_text(encoding="utf-8")).get("ok"))
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+class HttpCache:
+    def __init__(self, directory: Path = CACHE_DIR, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.prune()
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self.directory / f"{key}.body", self.directory / f"{key}.json"
+
+    def _load(self, url: str) -> tuple[dict, bytes] | None:
+        body_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or meta.get("sha256") != hashlib.sha256(body).hexdigest():
+            return None
+        return meta, body
+
+    def _write(self, path: Path, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _store(self, url: str, meta: dict, body: bytes | None) -> None:
+        body_path, meta_path = self._paths(url)
+        if body is not None:
+            self._write(body_path, body)
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def fetch(self, url: str, headers: dict | None = None, timeout: float = 20) -> CachedResponse:
+        """GET `url`, revalidating any cached copy; network errors propagate."""
+        cached = self._load(url)
+        request_headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        if cached:
+            meta, _ = cached
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("lastModified"):
+                request_headers["If-Modified-Since"] = meta["lastModified"]
+
+        now = time.time()
+        try:
+            with urlopen(Request(url, headers=request_headers), timeout=timeout) as resp:
+                status = resp.status
+                body = resp.read()
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+        except HTTPError as exc:
+            if exc.code != 304 or not cached:
+                raise
+            meta, body = cached
+            meta["usedAt"] = now
+            self._store(url, meta, None)
+            return CachedResponse(url, body, changed=False, status=304)
+
+        digest = hashlib.sha256(body).hexdigest()
+        changed = not cached or cached[0].get("sha256") != digest
+        meta = {
+            "url": url,
+            "etag": etag,
+            "lastModified": last_modified,
+            "sha256": digest,
+            "size": len(body),
+            "fetchedAt": now,
+            "usedAt": now,
+        }
+        self._store(url, meta, body if changed else None)
+        return CachedResponse(url, body, changed=changed, status=status)
+
+    def prune(self) -> int:
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        entries = []
+        now = time.time()
+        removed = 0
+        for meta_path in self.directory.glob("*.json"):
+            body_path = meta_path.with_suffix(".body")
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                size = body_path.stat().st_size
+            except (OSError, ValueError):
+                meta, size = {}, 0
+            used = meta.get("usedAt", 0)
+            if not meta or now - used > self.ttl:
+                removed += self._remove(meta_path, body_path)
+                continue
+            entries.append((used, size, meta_path, body_path))
+
+        for body_path in self.directory.glob("*.body"):
+            if not body_path.with_suffix(".json").exists():
+                removed += self._remove(body_path)
+
+        total = sum(size for _, size, _, _ in entries)
+        for used, size, meta_path, body_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(meta_path, body_path)
+            total -= size
+        return removed
+
+    @staticmethod
+    def _remove(*paths: Path) -> int:
+        for path in paths:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        return 1
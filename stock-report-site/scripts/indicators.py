@@ -0,0 +1,184 @@
+"""Technical indicators for report frames, updated incrementally between runs.
+
+Per close series we keep an `IndicatorState`. It holds the last
+LOOKBACK closes (for the SMA, Bollinger and volatility windows), the EMA
+values, Wilder's average gain/loss for RSI and the running peak for
+drawdown. A run folds in only the bars that are newer than the saved state,
+so an hourly run costs O(new bars). The newest bar is evaluated on a copy
+and never saved, because Yahoo keeps restating it until it closes.
+
+When there is no usable state (first run, or the cached history changed
+under it), `seed` rebuilds one in a single vectorized pass over the history.
+The same happens when the series starts at a different bar than the state
+did, so the peak, count and averages always cover exactly the cached window
+and match a full recompute over it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SMA_WINDOWS = (20, 50, 200)
+EMA_SPANS = (20, 50, 200)
+RSI_PERIOD = 14
+VOLATILITY_WINDOW = 20
+BOLLINGER_WINDOW = 20
+BOLLINGER_WIDTH = 2
+LOOKBACK = max(*SMA_WINDOWS, VOLATILITY_WINDOW + 1, BOLLINGER_WINDOW)
+
+
+@dataclass
+class IndicatorState:
+    first_ts: int = 0
+    ts: int = 0
+    close: float = 0.0
+    count: int = 0
+    window: list = field(default_factory=list)
+    ema: dict = field(default_factory=dict)
+    avg_gain: float = 0.0
+    avg_loss: float = 0.0
+    peak: float = 0.0
+
+    def copy(self) -> "IndicatorState":
+        return IndicatorState(**{**asdict(self), "window": list(self.window), "ema": dict(self.ema)})
+
+
+def seed(ts: np.ndarray, closes: np.ndarray) -> IndicatorState:
+    """State after folding every close, computed column-wise."""
+    state = IndicatorState()
+    if len(closes) == 0:
+        return state
+    series = pd.Series(closes)
+    gains = series.diff().iloc[1:]
+    alpha = 1 / RSI_PERIOD
+    state.first_ts = int(ts[0])
+    state.ts = int(ts[-1])
+    state.close = float(closes[-1])
+    state.count = len(closes)
+    state.window = closes[-LOOKBACK:].tolist()
+    state.ema = {str(span): float(series.ewm(span=span, adjust=False).mean().iloc[-1]) for span in EMA_SPANS}
+    if len(gains):
+        state.avg_gain = float(gains.clip(lower=0).ewm(alpha=alpha, adjust=False).mean().iloc[-1])
+        state.avg_loss = float((-gains).clip(lower=0).ewm(alpha=alpha, adjust=False).mean().iloc[-1])
+    state.peak = float(closes.max())
+    return state
+
+
+def fold(state: IndicatorState, ts: np.ndarray, closes: np.ndarray) -> IndicatorState:
+    """Advance `state` bar by bar; the same recurrences as `seed`."""
+    alpha = 1 / RSI_PERIOD
+    for stamp, close in zip(ts.tolist(), closes.tolist()):
+        if state.count == 0:
+            state.first_ts = stamp
+            state.ema = {str(span): close for span in EMA_SPANS}
+            state.peak = close
+        else:
+            for span in EMA_SPANS:
+                k = 2 / (span + 1)
+                state.ema[str(span)] = (1 - k) * state.ema[str(span)] + k * close
+            change = close - state.close
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            if state.count == 1:
+                state.avg_gain, state.avg_loss = gain, loss
+            else:
+                state.avg_gain = (1 - alpha) * state.avg_gain + alpha * gain
+                state.avg_loss = (1 - alpha) * state.avg_loss + alpha * loss
+            state.peak = max(state.peak, close)
+        state.window.append(close)
+        if len(state.window) > LOOKBACK:
+            del state.window[0]
+        state.ts, state.close = stamp, close
+        state.count += 1
+    return state
+
+
+def _round(value, digits: int):
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def snapshot(state: IndicatorState) -> dict | None:
+    if state.count < 2:
+        return None
+    window = np.array(state.window)
+    out = {}
+    for size in SMA_WINDOWS:
+        out[f"sma{size}"] = _round(window[-size:].mean(), 2) if state.count >= size else None
+    for span in EMA_SPANS:
+        out[f"ema{span}"] = _round(state.ema[str(span)], 2) if state.count >= span else None
+
+    rsi = None
+    if state.count > RSI_PERIOD:
+        rsi = 100.0 if state.avg_loss == 0 else 100 - 100 / (1 + state.avg_gain / state.avg_loss)
+    out[f"rsi{RSI_PERIOD}"] = _round(rsi, 2)
+
+    volatility = None
+    if state.count > VOLATILITY_WINDOW:
+        tail = window[-(VOLATILITY_WINDOW + 1):]
+        volatility = np.std(np.diff(tail) / tail[:-1], ddof=1) * 100
+    out["volatility"] = _round(volatility, 3)
+    out["drawdown"] = _round((state.close / state.peak - 1) * 100, 3) if state.peak else None
+
+    bollinger = None
+    if state.count >= BOLLINGER_WINDOW:
+        tail = window[-BOLLINGER_WINDOW:]
+        middle, width = tail.mean(), BOLLINGER_WIDTH * tail.std()
+        bollinger = {"upper": _round(middle + width, 2), "middle": _round(middle, 2), "lower": _round(middle - width, 2)}
+    out["bollinger"] = bollinger
+    return out
+
+
+def _epoch_seconds(index: pd.Index) -> np.ndarray:
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    return index.tz_convert("UTC").as_unit("s").asi8
+
+
+class IndicatorStore:
+    """Indicator states for several series, persisted as one JSON file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.states: dict[str, IndicatorState] = {}
+        if self.path.exists():
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+                self.states = {key: IndicatorState(**value) for key, value in raw.items()}
+            except (OSError, ValueError, TypeError) as exc:
+                print(f"Warning: ignoring unreadable {self.path}: {exc}")
+
+    def indicators(self, key: str, series: pd.Series) -> dict | None:
+        """Indicators as of the last close in `series` (oldest first, no NaN)."""
+        if series is None or len(series) < 2:
+            return None
+        ts = _epoch_seconds(series.index)
+        closes = series.to_numpy(dtype=float)
+
+        state = self.states.get(key)
+        start = None
+        # Bars that left the window would linger in the peak and averages; start over instead.
+        if state is not None and state.count and state.first_ts == ts[0]:
+            pos = int(np.searchsorted(ts, state.ts))
+            if pos < len(ts) - 1 and ts[pos] == state.ts and closes[pos] == state.close:
+                start = pos + 1
+        if start is None:
+            state = seed(ts[:-1], closes[:-1])
+            start = len(closes) - 1
+        # Everything but the newest bar is final and can be committed.
+        fold(state, ts[start:-1], closes[start:-1])
+        self.states[key] = state
+        return snapshot(fold(state.copy(), ts[-1:], closes[-1:]))
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({key: asdict(s) for key, s in self.states.items()}), encoding="utf-8")
+        os.replace(tmp, self.path)
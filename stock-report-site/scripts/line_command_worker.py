@@ -5,18 +5,16 @@ from __future__ import annotations
 
 import json
 import os
-import subprocess
-import sys
 from pathlib import Path
 from typing import Iterable
 from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
+import send_tw_brief
+import send_us_brief
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 ENV_FILE = BASE_DIR / '.env'
-LINE_SCRIPT = BASE_DIR / 'scripts' / 'notify_line.py'
-TW_BRIEF = BASE_DIR / 'scripts' / 'send_tw_brief.py'
-US_BRIEF = BASE_DIR / 'scripts' / 'send_us_brief.py'
 COMMAND_ENDPOINT = 'https://line-webhook.googselect.workers.dev/commands'
 ACK_ENDPOINT = 'https://line-webhook.googselect.workers.dev/commands/ack'
 
@@ -70,12 +68,19 @@ def ack_commands(token: str, ids: Iterable[str]) -> None:
         print(f'Failed to ack commands: {exc}')
 
 
-def run_brief(script: Path) -> bool:
+def run_brief(brief) -> bool:
+    # In-process, so every command in this poll shares one LINE client (token, subscribers, connection).
     try:
-        subprocess.run([sys.executable, str(script), '--skip-update'], check=True)
+        brief.main(['--skip-update'])
         return True
-    except subprocess.CalledProcessError as exc:
-        print(f'{script.name} failed: {exc}')
+    except SystemExit as exc:
+        # argparse and the briefs exit instead of raising; that must not end this poll.
+        if exc.code in (None, 0):
+            return True
+        print(f'{brief.__name__} exited: {exc.code}')
+        return False
+    except Exception as exc:
+        print(f'{brief.__name__} failed: {exc}')
         return False
 
 
@@ -84,9 +89,9 @@ def handle_command(cmd: dict) -> bool:
     if not command:
         return True
     if command in {'TW', 'TW BRIEF', 'TW NOW'}:
-        return run_brief(TW_BRIEF)
+        return run_brief(send_tw_brief)
     if command in {'US', 'US BRIEF', 'US NOW'}:
-        return run_brief(US_BRIEF)
+        return run_brief(send_us_brief)
     print(f'Unknown LINE command: {command}')
     return True
 
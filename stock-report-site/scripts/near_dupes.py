@@ -0,0 +1,184 @@
+"""Near-duplicate headline clustering with MinHash + LSH.
+
+Google News returns the same story from many outlets under slightly
+different titles ("台積電法說會報喜 - 經濟日報", "台積電法說會 報喜｜中時").
+Exact (title, url) dedupe does not catch these.
+
+Each title is reduced to character trigrams, after its trailing
+" - Outlet" is stripped and punctuation and spacing are dropped. The trigrams
+become a NUM_PERM MinHash signature. Signatures are split into BANDS bands
+and indexed by band, so a new title is compared only with clusters that
+share a band (sub-linear in history size). It joins the best candidate whose
+estimated Jaccard similarity reaches `threshold`, otherwise it starts a new
+cluster.
+
+Clusters from recent runs are kept in a small JSON file. A story keeps the
+same cluster id across runs, and its source count covers every outlet that
+carried it. Pure Python, so the scheduled workflow needs no extra packages.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import time
+import zlib
+from pathlib import Path
+from urllib.parse import urlsplit
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE = 3
+DEFAULT_THRESHOLD = 0.6
+DEFAULT_MAX_AGE = 3 * 86400
+MAX_CLUSTERS = 5000
+MAX_SOURCES = 50
+_PRIME = 4294967311  # smallest prime above 2**32
+_rng = random.Random(20240601)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+OUTLET_RE = re.compile(r"(?:\s+[-–—|]\s+|\s*｜\s*)([^-–—|｜]{1,40})$")
+NOISE_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def split_outlet(title: str) -> tuple[str, str | None]:
+    """'Headline - Outlet' -> ('Headline', 'Outlet')."""
+    match = OUTLET_RE.search(title)
+    if not match:
+        return title, None
+    return title[: match.start()], match.group(1).strip()
+
+
+def shingles(title: str) -> set[int]:
+    text = NOISE_RE.sub("", split_outlet(title)[0].lower())
+    if len(text) <= SHINGLE:
+        grams = {text} if text else set()
+    else:
+        grams = {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+    return {zlib.crc32(g.encode("utf-8")) for g in grams}
+
+
+def signature(title: str) -> tuple[int, ...] | None:
+    hashes = list(shingles(title))
+    if not hashes:
+        return None
+    # Universal hashing (a*h + b) mod p stands in for NUM_PERM random permutations.
+    return tuple(min([(a * h + b) % _PRIME for h in hashes]) for a, b in _PERMS)
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def _bands(sig: tuple[int, ...]) -> list[tuple]:
+    return [(i, sig[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+
+
+def source_name(item: dict) -> str:
+    outlet = split_outlet(item.get("title") or item.get("titleZh") or item.get("titleEn") or "")[1]
+    return outlet or urlsplit(item.get("url") or "").hostname or "?"
+
+
+class NearDupIndex:
+    def __init__(self, path: Path | None = None, threshold: float = DEFAULT_THRESHOLD, max_age: float = DEFAULT_MAX_AGE):
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.max_age = max_age
+        # cluster id -> {"sig": [...], "sources": [...], "seenAt": ts}
+        self.clusters: dict[str, dict] = {}
+        self._buckets: dict[tuple, list[str]] = {}
+        self._next_id = 0
+        if self.path and self.path.exists():
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+                self._next_id = int(raw.get("nextId", 0))
+                for cid, cluster in raw.get("clusters", {}).items():
+                    cluster["sig"] = tuple(int(v, 16) for v in cluster["sig"].split())
+                    self._insert(cid, cluster)
+            except (OSError, ValueError, KeyError, AttributeError) as exc:
+                print(f"Warning: ignoring unreadable {self.path}: {exc}")
+                self.clusters, self._buckets = {}, {}
+
+    def _insert(self, cid: str, cluster: dict) -> None:
+        self.clusters[cid] = cluster
+        for band in _bands(cluster["sig"]):
+            self._buckets.setdefault(band, []).append(cid)
+
+    def match(self, sig: tuple[int, ...]) -> str | None:
+        best, best_score = None, self.threshold
+        checked = set()
+        for band in _bands(sig):
+            for cid in self._buckets.get(band, ()):
+                if cid in checked or cid not in self.clusters:
+                    continue
+                checked.add(cid)
+                score = similarity(sig, self.clusters[cid]["sig"])
+                if score >= best_score:
+                    best, best_score = cid, score
+        return best
+
+    def add(self, sig: tuple[int, ...], source: str, now: float) -> str:
+        cid = self.match(sig)
+        if cid is None:
+            cid = f"c{self._next_id}"
+            self._next_id += 1
+            self._insert(cid, {"sig": sig, "sources": [], "seenAt": now})
+        cluster = self.clusters[cid]
+        if source not in cluster["sources"] and len(cluster["sources"]) < MAX_SOURCES:
+            cluster["sources"].append(source)
+        cluster["seenAt"] = now
+        return cid
+
+    def save(self, now: float | None = None) -> None:
+        if not self.path:
+            return
+        now = time.time() if now is None else now
+        live = sorted(
+            ((cid, c) for cid, c in self.clusters.items() if now - c["seenAt"] <= self.max_age),
+            key=lambda pair: pair[1]["seenAt"],
+            reverse=True,
+        )[:MAX_CLUSTERS]
+        payload = {
+            "nextId": self._next_id,
+            "clusters": {
+                cid: {"sig": " ".join(f"{v:x}" for v in c["sig"]), "sources": c["sources"], "seenAt": round(c["seenAt"])}
+                for cid, c in live
+            },
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def cluster_items(items: list[dict], index: NearDupIndex, now: float | None = None) -> list[dict]:
+    """One representative per near-duplicate cluster, in order of first appearance.
+
+    The representative is the earliest member (Google's ranking) that has a
+    summary distinct from its title, falling back to the earliest member.
+    Each gets `sourceCount` (outlets seen for the story, across runs) and
+    `clusterId`.
+    """
+    now = time.time() if now is None else now
+    members: dict[str, list[dict]] = {}
+    for item in items:
+        title = item.get("title") or item.get("titleZh") or item.get("titleEn") or ""
+        sig = signature(title)
+        if sig is None:
+            continue
+        cid = index.add(sig, source_name(item), now)
+        members.setdefault(cid, []).append(item)
+
+    out = []
+    for cid, group in members.items():
+        best = next((m for m in group if _has_summary(m)), group[0])
+        out.append({**best, "sourceCount": len(index.clusters[cid]["sources"]), "clusterId": cid})
+    return out
+
+
+def _has_summary(item: dict) -> bool:
+    title = item.get("titleZh") or item.get("titleEn") or item.get("title") or ""
+    summary = item.get("summaryZh") or item.get("summaryEn") or ""
+    return bool(summary) and summary != title
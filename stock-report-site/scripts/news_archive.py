@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Persistent, searchable archive of every headline the news jobs produce.
+
+Each job passes its normalized items (the `normalize_and_dedupe` output, or
+the cnyes `headlines`) to `archive_items`. Rows are upserted into
+data/news_archive.sqlite, keyed by canonical URL: `firstSeenAt` is kept and
+`lastSeenAt` is bumped. Title and summary are indexed in an FTS5 table with
+the trigram tokenizer, so Chinese substrings such as 台積電 match without
+word segmentation. Queries shorter than three characters fall back to LIKE
+over the time-window index.
+
+Usage:
+  python scripts/news_archive.py search 台積電 --days 30
+  python scripts/news_archive.py search "arabica" --source coffee_news --json
+  python scripts/news_archive.py backfill      # ingest the current data/*.json
+  python scripts/news_archive.py stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from news_urls import canonical_url
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARCHIVE_FILE = BASE_DIR / "data" / "news_archive.sqlite"
+# Output files the archive can backfill from, with the list key holding their items.
+SOURCES = {
+    "tw_news": ("tw_news.json", "headlines"),
+    "us_news": ("us_news.json", "headlines"),
+    "coffee_news": ("coffee_news.json", "news"),
+    "interesting_stories": ("interesting_stories.json", "stories"),
+}
+MIN_FTS_CHARS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS headlines (
+    id INTEGER PRIMARY KEY,
+    url_key TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    lang TEXT,
+    source TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS headlines_last_seen ON headlines (last_seen);
+CREATE VIRTUAL TABLE IF NOT EXISTS headlines_fts USING fts5(
+    title, summary, content='headlines', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS headlines_ai AFTER INSERT ON headlines BEGIN
+    INSERT INTO headlines_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS headlines_au AFTER UPDATE OF title, summary ON headlines BEGIN
+    INSERT INTO headlines_fts (headlines_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+    INSERT INTO headlines_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS headlines_ad AFTER DELETE ON headlines BEGIN
+    INSERT INTO headlines_fts (headlines_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+END;
+"""
+
+UPSERT = """
+INSERT INTO headlines (url_key, url, title, summary, lang, source, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url_key) DO UPDATE SET
+    title = excluded.title,
+    summary = CASE WHEN excluded.summary != '' THEN excluded.summary ELSE headlines.summary END,
+    last_seen = MAX(headlines.last_seen, excluded.last_seen)
+"""
+
+
+def item_fields(item: dict) -> tuple[str, str]:
+    """(title, summary) from any of the news jobs' item shapes."""
+    title = item.get("title") or item.get("titleZh") or item.get("titleEn") or ""
+    summary = item.get("summaryZh") or item.get("summaryEn") or item.get("summary") or ""
+    if summary == title:
+        summary = ""
+    return " ".join(title.split()), " ".join(summary.split())
+
+
+class NewsArchive:
+    def __init__(self, path: Path = ARCHIVE_FILE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def upsert(self, items: list[dict], source: str, seen_at: float | None = None) -> int:
+        seen_at = time.time() if seen_at is None else seen_at
+        rows = []
+        for item in items:
+            url = (item.get("url") or "").strip()
+            title, summary = item_fields(item)
+            if not url or not title:
+                continue
+            rows.append((canonical_url(url), url, title, summary, item.get("lang"), source, seen_at, seen_at))
+        with self.conn:
+            self.conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def search(
+        self, text: str, days: float | None = 30, source: str | None = None, limit: int = 50
+    ) -> list[dict]:
+        """Headlines whose title or summary contains `text`, newest first."""
+        text = text.strip()
+        where, params = [], []
+        if days is not None:
+            where.append("h.last_seen >= ?")
+            params.append(time.time() - days * 86400)
+        if source:
+            where.append("h.source = ?")
+            params.append(source)
+
+        if len(text) >= MIN_FTS_CHARS:
+            # Quoted so the query is a literal phrase, not FTS syntax.
+            phrase = '"' + text.replace('"', '""') + '"'
+            query = "SELECT h.* FROM headlines_fts f JOIN headlines h ON h.id = f.rowid WHERE headlines_fts MATCH ?"
+            params.insert(0, phrase)
+        else:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            query = "SELECT h.* FROM headlines h WHERE (h.title LIKE ? ESCAPE '\\' OR h.summary LIKE ? ESCAPE '\\')"
+            params[:0] = [pattern, pattern]
+        if where:
+            query += " AND " + " AND ".join(where)
+        query += " ORDER BY h.last_seen DESC LIMIT ?"
+        params.append(limit)
+        return [self._row(row) for row in self.conn.execute(query, params)]
+
+    def stats(self) -> dict:
+        rows = self.conn.execute(
+            "SELECT source, COUNT(*) AS n, MIN(first_seen) AS oldest, MAX(last_seen) AS newest FROM headlines GROUP BY source"
+        ).fetchall()
+        return {row["source"]: {"count": row["n"], "oldest": _iso(row["oldest"]), "newest": _iso(row["newest"])} for row in rows}
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> dict:
+        return {
+            "title": row["title"],
+            "summary": row["summary"],
+            "url": row["url"],
+            "lang": row["lang"],
+            "source": row["source"],
+            "firstSeenAt": _iso(row["first_seen"]),
+            "lastSeenAt": _iso(row["last_seen"]),
+        }
+
+
+def _iso(ts: float | None) -> str | None:
+    if ts is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(ts))
+
+
+def archive_items(items: list[dict], source: str, path: Path = ARCHIVE_FILE) -> None:
+    """Best-effort ingest for the news jobs: an archive problem never fails the job."""
+    try:
+        archive = NewsArchive(path)
+        try:
+            count = archive.upsert(items, source)
+        finally:
+            archive.close()
+        print(f"Archived {count} {source} items")
+    except (sqlite3.Error, OSError) as exc:
+        print(f"Warning: news archive not updated: {exc}")
+
+
+def backfill(archive: NewsArchive) -> None:
+    for source, (name, key) in SOURCES.items():
+        path = BASE_DIR / "data" / name
+        if not path.exists():
+            continue
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        count = archive.upsert(payload.get(key) or [], source)
+        print(f"{source}: {count} items")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Search or fill the local headline archive.")
+    parser.add_argument("--db", type=Path, default=ARCHIVE_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    search = sub.add_parser("search", help="full-text search over titles and summaries")
+    search.add_argument("text")
+    search.add_argument("--days", type=float, default=30, help="only headlines seen in the last N days (0 = all)")
+    search.add_argument("--source", choices=sorted(SOURCES))
+    search.add_argument("--limit", type=int, default=50)
+    search.add_argument("--json", action="store_true")
+    sub.add_parser("backfill", help="ingest the current data/*.json outputs")
+    sub.add_parser("stats", help="row counts per source")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    archive = NewsArchive(args.db)
+    try:
+        if args.command == "backfill":
+            backfill(archive)
+        elif args.command == "stats":
+            print(json.dumps(archive.stats(), ensure_ascii=False, indent=2))
+        else:
+            started = time.perf_counter()
+            results = archive.search(args.text, days=args.days or None, source=args.source, limit=args.limit)
+            elapsed = (time.perf_counter() - started) * 1000
+            if args.json:
+                print(json.dumps(results, ensure_ascii=False, indent=2))
+                return
+            for row in results:
+                print(f"{row['lastSeenAt'][:10]}  [{row['source']}] {row['title']}\n            {row['url']}")
+            print(f"{len(results)} results in {elapsed:.1f} ms")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""URL canonicalization shared by the news archive and dedupe steps.
+
+The same article often arrives under several URLs that differ only in case,
+fragment or tracking parameters. `canonical_url` maps all of them to one key.
+"""
+
+from __future__ import annotations
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "spm", "cmpid", "ocid", "oc",
+}
+TRACKING_PREFIXES = ("utm_", "ga_", "_hs")
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url: str) -> str:
+    """Lower-case scheme/host, no fragment, default port or tracking parameters."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    if port and (scheme, port) not in {("http", 80), ("https", 443)}:
+        host = f"{host}:{port}"
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not is_tracking_param(k)])
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
@@ -1,22 +1,47 @@
 #!/usr/bin/env python3
-"""Send a LINE push notification using channel credentials from .env."""
+"""Send a LINE push notification using channel credentials from .env.
+
+Import it and call `send_line(text)` to send from another script; the command line
+wraps the same client.
+"""
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import http.client
 import json
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
-from urllib.request import Request, urlopen
-from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 ENV_FILE = BASE_DIR / ".env"
-LINE_TOKEN_URL = "https://api.line.me/v2/oauth/accessToken"
-LINE_PUSH_URL = "https://api.line.me/v2/bot/message/push"
-LINE_SUBSCRIBERS_URL = "https://line-webhook.googselect.workers.dev/subscribers"
+TOKEN_CACHE = Path(os.environ.get("LINE_TOKEN_CACHE") or BASE_DIR / "data" / "cache" / "line_token.json")
+# Refresh this long before the cached token's stated expiry.
+TOKEN_REFRESH_MARGIN = 24 * 3600
+LINE_API_BASE = os.environ.get("LINE_API_BASE", "https://api.line.me").rstrip("/")
+LINE_TOKEN_URL = f"{LINE_API_BASE}/v2/oauth/accessToken"
+LINE_PUSH_URL = f"{LINE_API_BASE}/v2/bot/message/push"
+LINE_MULTICAST_URL = f"{LINE_API_BASE}/v2/bot/message/multicast"
+# LINE accepts up to 500 recipients per multicast request.
+MULTICAST_BATCH = 500
+MULTICAST_WORKERS = 4
+# Request starts per second across all batches, well under LINE's API limit.
+MULTICAST_RATE = 20.0
+MAX_RATE_LIMIT_RETRIES = 3
+MAX_RETRY_AFTER = 60.0
+LINE_SUBSCRIBERS_URL = os.environ.get("LINE_SUBSCRIBERS_URL", "https://line-webhook.googselect.workers.dev/subscribers")
+SUBSCRIBER_CACHE = Path(os.environ.get("LINE_SUBSCRIBER_CACHE") or BASE_DIR / "data" / "cache" / "line_subscribers.json")
+# Pushes within this window reuse the cached list without asking the worker at all.
+SUBSCRIBER_TTL = 10 * 60
+# Fetch the full list at least this often, even when deltas keep applying cleanly.
+SUBSCRIBER_RESYNC = 24 * 3600
 
 
 def load_env() -> None:
@@ -30,24 +55,139 @@ def load_env() -> None:
         os.environ.setdefault(key.strip(), value.strip())
 
 
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections, shared by every request and thread in the process."""
+
+    def __init__(self):
+        self._idle: dict[tuple, list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key: tuple, timeout: float) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout)
+
+    def request(
+        self, method: str, url: str, body: bytes | None = None, headers: dict[str, str] | None = None, timeout: float = 10
+    ) -> tuple[int, Any, bytes]:
+        """Send one request; returns (status, headers, body) for any status code."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        for attempt in range(2):
+            conn = self._acquire(key, timeout)
+            reused = conn.sock is not None
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # The server dropped an idle keep-alive connection; retry once on a new one.
+                if reused and attempt == 0:
+                    continue
+                raise
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.setdefault(key, []).append(conn)
+            return resp.status, resp.headers, data
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+_pool = ConnectionPool()
+
+
+class LineAuthError(RuntimeError):
+    """LINE rejected the access token (HTTP 401)."""
+
+
 def get_access_token(channel_id: str, channel_secret: str) -> str:
+    return request_access_token(channel_id, channel_secret)[0]
+
+
+def request_access_token(channel_id: str, channel_secret: str) -> tuple[str, float]:
+    """Issue a new short-lived channel token; returns (token, expiry epoch)."""
     payload = (
         "grant_type=client_credentials"
         f"&client_id={channel_id}"
         f"&client_secret={channel_secret}"
     ).encode()
-    req = Request(LINE_TOKEN_URL, data=payload, headers={
+    status, _, body = _pool.request("POST", LINE_TOKEN_URL, payload, {
         "content-type": "application/x-www-form-urlencoded"
     })
-    with urlopen(req, timeout=10) as resp:
-        data = json.loads(resp.read().decode())
+    if status != 200:
+        raise RuntimeError(f"Failed to obtain LINE access token: {status} {body.decode(errors='replace')}")
+    data = json.loads(body.decode())
     token = data.get("access_token")
     if not token:
         raise RuntimeError(f"Failed to obtain LINE access token: {data}")
+    return token, time.time() + float(data.get("expires_in") or 0)
+
+
+def load_cached_token(channel_id: str, path: Path = TOKEN_CACHE) -> str | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        expires_at = float(data.get("expiresAt") or 0)
+    except (OSError, ValueError, TypeError, AttributeError):
+        # Unreadable, not a JSON object, or a malformed expiry: treat it as a miss.
+        return None
+    if data.get("channelId") != channel_id or not data.get("accessToken"):
+        return None
+    if expires_at - TOKEN_REFRESH_MARGIN <= time.time():
+        return None
+    return data["accessToken"]
+
+
+def write_private_json(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    # Created 0600 from the start, so the contents are never briefly world-readable.
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    os.chmod(tmp, 0o600)
+    os.replace(tmp, path)
+
+
+def store_token(channel_id: str, token: str, expires_at: float, path: Path = TOKEN_CACHE) -> None:
+    write_private_json(path, {"channelId": channel_id, "accessToken": token, "expiresAt": expires_at})
+
+
+def cached_access_token(channel_id: str, channel_secret: str, refresh: bool = False, path: Path = TOKEN_CACHE) -> str:
+    """The cached channel token, fetching a new one if it is missing, near expiry or `refresh` is set."""
+    if not refresh:
+        token = load_cached_token(channel_id, path)
+        if token:
+            return token
+    token, expires_at = request_access_token(channel_id, channel_secret)
+    try:
+        store_token(channel_id, token, expires_at, path)
+    except OSError as exc:
+        print(f"Warning: LINE token not cached: {exc}")
     return token
 
 
-def push_message(token: str, user_id: str, text: str, image_url: str | None) -> None:
+def build_messages(text: str, image_url: str | None) -> list[dict[str, Any]]:
     messages = []
     if text:
         messages.append({"type": "text", "text": text})
@@ -59,37 +199,246 @@ def push_message(token: str, user_id: str, text: str, image_url: str | None) ->
         })
     if not messages:
         raise RuntimeError("Nothing to send to LINE")
-    payload = json.dumps({
-        "to": user_id,
-        "messages": messages
-    }).encode("utf-8")
-    req = Request(LINE_PUSH_URL, data=payload, headers={
+    return messages
+
+
+def post_messages(url: str, token: str, body: dict[str, Any]) -> None:
+    """POST a message payload, retrying on 429 after the server's Retry-After."""
+    payload = json.dumps(body).encode("utf-8")
+    headers = {
         "content-type": "application/json",
         "authorization": f"Bearer {token}"
-    })
+    }
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        try:
+            status, resp_headers, body = _pool.request("POST", url, payload, headers)
+        except (http.client.HTTPException, OSError) as exc:
+            raise RuntimeError(f"LINE push connection error: {exc}")
+        if status == 200:
+            return
+        detail = body.decode(errors="replace")
+        if status == 401:
+            raise LineAuthError(f"LINE push unauthorized: {detail}")
+        if status == 429 and attempt < MAX_RATE_LIMIT_RETRIES:
+            time.sleep(retry_after(resp_headers.get("Retry-After"), attempt))
+            continue
+        raise RuntimeError(f"LINE push failed: {status} {detail}")
+
+
+def retry_after(header: str | None, attempt: int) -> float:
     try:
-        with urlopen(req, timeout=10) as resp:
-            resp.read()
-    except HTTPError as exc:
-        detail = exc.read().decode()
-        raise RuntimeError(f"LINE push failed: {exc.code} {detail}")
-    except URLError as exc:
-        raise RuntimeError(f"LINE push connection error: {exc}")
+        return min(float(header), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return min(2.0 ** attempt, MAX_RETRY_AFTER)
+
+
+def push_message(token: str, user_id: str, text: str, image_url: str | None) -> None:
+    post_messages(LINE_PUSH_URL, token, {"to": user_id, "messages": build_messages(text, image_url)})
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart across threads."""
 
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def wait(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_at)
+            self.next_at = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def multicast(
+    token: str,
+    targets: list[str],
+    messages: list[dict[str, Any]],
+    batch_size: int = MULTICAST_BATCH,
+    max_workers: int = MULTICAST_WORKERS,
+    rate: float = MULTICAST_RATE,
+) -> list[tuple[list[str], Exception]]:
+    """Send to every target in multicast batches; returns [(batch, error)] for failed batches."""
+    batches = [targets[i:i + batch_size] for i in range(0, len(targets), batch_size)]
+    limiter = RateLimiter(rate)
+
+    def send(batch: list[str]) -> None:
+        limiter.wait()
+        post_messages(LINE_MULTICAST_URL, token, {"to": batch, "messages": messages})
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as pool:
+        for batch, future in [(batch, pool.submit(send, batch)) for batch in batches]:
+            error = future.exception()
+            if error is not None:
+                failures.append((batch, error))
+    return failures
+
+
+def string_ids(value: Any) -> list[str]:
+    return [item for item in value if isinstance(item, str)] if isinstance(value, list) else []
 
 
 def get_subscriber_ids() -> list[str]:
+    """The full subscriber list, uncached."""
+    return fetch_subscribers(None)["ids"]
+
+
+def fetch_subscribers(cached: dict[str, Any] | None) -> dict[str, Any]:
+    """Revalidate a cached subscriber record with one request; returns the new record.
+
+    Sends the cached ETag, plus its version as a `since` cursor. The worker
+    answers 304 if nothing changed, or just the IDs added and removed since
+    then, or the full list if the cursor is too old. A delta whose result does
+    not match the worker's digest, or a record last fully synced more than
+    SUBSCRIBER_RESYNC ago, falls back to a full fetch.
+    """
     headers = {
         "accept": "application/json",
         "user-agent": "line-bot/1.0"
     }
-    req = Request(LINE_SUBSCRIBERS_URL, headers=headers)
-    with urlopen(req, timeout=10) as resp:
-        data = json.loads(resp.read().decode())
-    ids = data.get("ids", [])
-    if not isinstance(ids, list):
-        return []
-    return [item for item in ids if isinstance(item, str)]
+    if cached and time.time() - float(cached.get("syncedAt") or 0) >= SUBSCRIBER_RESYNC:
+        cached = None
+    url = LINE_SUBSCRIBERS_URL
+    if cached:
+        if cached.get("etag"):
+            headers["if-none-match"] = cached["etag"]
+        if isinstance(cached.get("version"), int):
+            url += ("&" if "?" in url else "?") + f"since={cached['version']}"
+    status, resp_headers, body = _pool.request("GET", url, headers=headers)
+    now = time.time()
+    if status == 304 and cached:
+        return {**cached, "fetchedAt": now}
+    if status != 200:
+        raise RuntimeError(f"Subscriber list request failed: {status}")
+    data = json.loads(body.decode())
+    if "ids" in data:
+        ids = string_ids(data["ids"])
+        synced_at = now
+    elif cached and ("added" in data or "removed" in data):
+        removed = set(string_ids(data.get("removed")))
+        ids = [uid for uid in cached["ids"] if uid not in removed]
+        present = set(ids)
+        ids += [uid for uid in string_ids(data.get("added")) if uid not in present]
+        if data.get("digest") and data["digest"] != subscriber_digest(ids):
+            # A change the worker lost or raced left the cached list wrong; start over.
+            print("Warning: subscriber list out of sync with the worker; refetching in full")
+            return fetch_subscribers(None)
+        synced_at = cached.get("syncedAt")
+    else:
+        raise RuntimeError("Unexpected subscriber list response")
+    version = data.get("version")
+    return {
+        "ids": ids,
+        "version": version if isinstance(version, int) else None,
+        "etag": resp_headers.get("ETag"),
+        "fetchedAt": now,
+        "syncedAt": synced_at,
+    }
+
+
+def subscriber_digest(ids: list[str]) -> str:
+    """SHA-256 of the sorted IDs, one per line, as the worker computes it."""
+    return hashlib.sha256("\n".join(sorted(ids)).encode("utf-8")).hexdigest()
+
+
+def cached_subscriber_ids(ttl: float = SUBSCRIBER_TTL, path: Path = SUBSCRIBER_CACHE) -> list[str]:
+    """Subscriber IDs from the disk cache, revalidated with the worker once `ttl` has passed."""
+    try:
+        cached = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(cached.get("ids"), list):
+            cached = None
+    except (OSError, ValueError, AttributeError):
+        cached = None
+    if cached and time.time() - float(cached.get("fetchedAt") or 0) < ttl:
+        return cached["ids"]
+    try:
+        record = fetch_subscribers(cached)
+    except (RuntimeError, ValueError, OSError, http.client.HTTPException) as exc:
+        if cached is None:
+            raise
+        print(f"Warning: subscriber refresh failed, using cached list: {exc}")
+        return cached["ids"]
+    try:
+        write_private_json(path, record)
+    except OSError as exc:
+        print(f"Warning: LINE subscribers not cached: {exc}")
+    return record["ids"]
+
+
+class LineClient:
+    """Sends LINE messages in-process, reusing the pooled connection, token and subscriber list.
+
+    Build one with `get_client()`; the briefs, report emails and command
+    worker share it instead of starting a notify_line.py subprocess per send.
+    """
+
+    def __init__(self, channel_id: str | None = None, channel_secret: str | None = None, fallback_user: str | None = None):
+        load_env()
+        self.channel_id = channel_id or os.environ.get("LINE_CHANNEL_ID")
+        self.channel_secret = channel_secret or os.environ.get("LINE_CHANNEL_SECRET")
+        self.fallback_user = fallback_user or os.environ.get("LINE_USER_ID")
+        if not self.channel_id or not self.channel_secret:
+            raise RuntimeError("Missing LINE_CHANNEL_ID / LINE_CHANNEL_SECRET")
+        self._token: str | None = None
+        self._subscribers: list[str] | None = None
+        self._subscribers_at = 0.0
+
+    def token(self, refresh: bool = False) -> str:
+        if refresh or self._token is None:
+            self._token = cached_access_token(self.channel_id, self.channel_secret, refresh=refresh)
+        return self._token
+
+    def recipients(self) -> list[str]:
+        if self._subscribers is None or time.monotonic() - self._subscribers_at >= SUBSCRIBER_TTL:
+            try:
+                self._subscribers = cached_subscriber_ids()
+                self._subscribers_at = time.monotonic()
+            except Exception as exc:
+                print(f"Warning: failed to fetch LINE subscribers: {exc}")
+        recipients = ([self.fallback_user] if self.fallback_user else []) + (self._subscribers or [])
+        # Hash-based dedupe that keeps the fallback user first.
+        return list(dict.fromkeys(recipients))
+
+    def send(self, text: str, image_url: str | None = None) -> int:
+        """Multicast to every recipient; returns how many were sent to."""
+        messages = build_messages(text, image_url)
+        targets = self.recipients()
+        if not targets:
+            raise RuntimeError("No LINE recipients available")
+
+        failures = multicast(self.token(), targets, messages)
+        if any(isinstance(error, LineAuthError) for _, error in failures):
+            # Revoked or expired early: get a fresh token once and resend the rejected batches.
+            token = self.token(refresh=True)
+            retry = [uid for batch, error in failures if isinstance(error, LineAuthError) for uid in batch]
+            failures = [f for f in failures if not isinstance(f[1], LineAuthError)] + multicast(token, retry, messages)
+        for batch, error in failures:
+            print(f"LINE multicast batch of {len(batch)} (first {batch[0]}) failed: {error}")
+        if failures:
+            failed = sum(len(batch) for batch, _ in failures)
+            raise RuntimeError(f"LINE push failed for {failed} of {len(targets)} recipient(s)")
+        return len(targets)
+
+
+_client: LineClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> LineClient:
+    """The process-wide LineClient, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LineClient()
+        return _client
+
+
+def send_line(text: str, image_url: str | None = None) -> int:
+    return get_client().send(text, image_url)
 
 
 def main(argv: list[str]) -> None:
@@ -98,31 +447,8 @@ def main(argv: list[str]) -> None:
     parser.add_argument("--image-url", help="Optional image URL to send")
     args = parser.parse_args(argv)
 
-    load_env()
-    channel_id = os.environ.get("LINE_CHANNEL_ID")
-    channel_secret = os.environ.get("LINE_CHANNEL_SECRET")
-    fallback_user = os.environ.get("LINE_USER_ID")
-    if not channel_id or not channel_secret:
-        raise SystemExit("Missing LINE_CHANNEL_ID / LINE_CHANNEL_SECRET")
-
-    token = get_access_token(channel_id, channel_secret)
-    targets: list[str] = []
-    if fallback_user:
-        targets.append(fallback_user)
-    try:
-        subscribers = get_subscriber_ids()
-        for subscriber in subscribers:
-            if subscriber not in targets:
-                targets.append(subscriber)
-    except Exception as exc:
-        print(f"Warning: failed to fetch LINE subscribers: {exc}")
-
-    if not targets:
-        raise SystemExit("No LINE recipients available")
-
-    for target in targets:
-        push_message(token, target, args.text, args.image_url)
-    print(f"Sent LINE push to {len(targets)} recipient(s)")
+    count = send_line(args.text, args.image_url)
+    print(f"Sent LINE push to {count} recipient(s)")
 
 
 if __name__ == "__main__":
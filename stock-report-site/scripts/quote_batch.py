@@ -0,0 +1,237 @@
+"""Batch parsing of TWSE MIS msgArray entries into NumPy columns.
+
+`QuoteBatch.from_entries` parses a whole poll in one pass and computes
+change / changePercent on integer columns, so rounding matches the
+Decimal-based `build_quote` exactly (half-even at two decimals). The
+best-five book (`a`/`f` asks, `b`/`g` bids) lands in fixed (n, 5) arrays.
+Per-item dicts are only built in `to_dicts` when the report is serialized.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+# Prices are held as integer micro-units so deltas and rounding stay exact.
+SCALE = 10**6
+CENT = SCALE // 100
+DEPTH_LEVELS = 5
+MISSING = {None, "", "-", "+"}
+DATE_RE = re.compile(r"^\d{8}$")
+TIME_RE = re.compile(r"^\d{2}:\d{2}:\d{2}$")
+
+
+def _float_column(values: list) -> np.ndarray:
+    cleaned = ["nan" if v in MISSING else v for v in values]
+    try:
+        return np.array(cleaned, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+    # Slow path for thousands separators or garbage; unparseable cells become NaN.
+    out = np.full(len(cleaned), np.nan)
+    for i, v in enumerate(cleaned):
+        try:
+            out[i] = float(str(v).replace(",", "").strip() or "nan")
+        except ValueError:
+            pass
+    return out
+
+
+def _depth_column(values: list) -> np.ndarray:
+    out = np.full((len(values), DEPTH_LEVELS), np.nan)
+    rows = []
+    sides = []
+    for i, v in enumerate(values):
+        if not v or not isinstance(v, str):
+            continue
+        # MIS terminates each book side with "_", e.g. "1905.0000_1910.0000_"
+        v = v.rstrip("_")
+        if not v:
+            continue
+        levels = v.count("_") + 1
+        if levels < DEPTH_LEVELS:
+            v += "_nan" * (DEPTH_LEVELS - levels)
+        elif levels > DEPTH_LEVELS:
+            v = "_".join(v.split("_")[:DEPTH_LEVELS])
+        rows.append(i)
+        sides.append(v)
+    if rows:
+        out[rows] = _float_column("_".join(sides).split("_")).reshape(len(rows), DEPTH_LEVELS)
+    return out
+
+
+def _nullable(values: np.ndarray, valid: np.ndarray) -> list:
+    out = values.astype(object)
+    out[~valid] = None
+    return out.tolist()
+
+
+def _round_half_even(numerator: np.ndarray, denominator: np.ndarray | int) -> np.ndarray:
+    """Integer division rounded half-to-even; denominator must be positive."""
+    quotient, remainder = np.divmod(numerator, denominator)
+    twice = 2 * remainder
+    round_up = (twice > denominator) | ((twice == denominator) & (quotient % 2 == 1))
+    return quotient + round_up
+
+
+def _to_list(values: np.ndarray, valid: np.ndarray) -> list:
+    return [v if ok else None for v, ok in zip(values.tolist(), valid.tolist())]
+
+
+@dataclass
+class QuoteBatch:
+    present: np.ndarray
+    last: np.ndarray
+    prev_close: np.ndarray
+    volume: np.ndarray
+    timestamp: np.ndarray
+    bid_price: np.ndarray
+    bid_size: np.ndarray
+    ask_price: np.ndarray
+    ask_size: np.ndarray
+
+    @classmethod
+    def from_entries(cls, entries: Sequence[dict | None]) -> "QuoteBatch":
+        rows = [e or {} for e in entries]
+        present = np.array([bool(e) for e in entries], dtype=bool)
+        last = _float_column([r.get("z") for r in rows])
+        prev_close = _float_column([r.get("y") for r in rows])
+        volume = _float_column([r.get("v") for r in rows])
+
+        stamps = []
+        for r in rows:
+            d, t = r.get("d"), r.get("t")
+            if d and t and DATE_RE.match(d) and TIME_RE.match(t):
+                stamps.append(f"{d[:4]}-{d[4:6]}-{d[6:]}T{t}")
+            else:
+                stamps.append("NaT")
+        try:
+            timestamp = np.array(stamps, dtype="datetime64[s]")
+        except ValueError:
+            timestamp = np.array(
+                [np.datetime64(s, "s") if _valid_stamp(s) else np.datetime64("NaT") for s in stamps],
+                dtype="datetime64[s]",
+            )
+        return cls(
+            present=present,
+            last=last,
+            prev_close=prev_close,
+            volume=volume,
+            timestamp=timestamp,
+            bid_price=_depth_column([r.get("b") for r in rows]),
+            bid_size=_depth_column([r.get("g") for r in rows]),
+            ask_price=_depth_column([r.get("a") for r in rows]),
+            ask_size=_depth_column([r.get("f") for r in rows]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    def depth_row(self, i: int) -> tuple[list, list, list, list] | None:
+        if np.isnan(self.bid_price[i]).all() and np.isnan(self.ask_price[i]).all():
+            return None
+        return (
+            self.bid_price[i].tolist(),
+            np.nan_to_num(self.bid_size[i]).astype(np.int64).tolist(),
+            self.ask_price[i].tolist(),
+            np.nan_to_num(self.ask_size[i]).astype(np.int64).tolist(),
+        )
+
+    def depth_blocks(self) -> list[dict | None]:
+        has_bid = ~np.isnan(self.bid_price)
+        has_ask = ~np.isnan(self.ask_price)
+        has_depth = has_bid.any(axis=1) | has_ask.any(axis=1)
+
+        bid_sizes = np.nan_to_num(self.bid_size).astype(np.int64)
+        ask_sizes = np.nan_to_num(self.ask_size).astype(np.int64)
+        bid_total = bid_sizes.sum(axis=1)
+        ask_total = ask_sizes.sum(axis=1)
+        total = bid_total + ask_total
+
+        has_spread = has_bid[:, 0] & has_ask[:, 0]
+        spread = np.round(self.ask_price[:, 0] - self.bid_price[:, 0], 2)
+        imbalance = np.round((bid_total - ask_total) / np.where(total > 0, total, 1), 4)
+
+        bid_prices = _nullable(np.round(self.bid_price, 2), has_bid)
+        ask_prices = _nullable(np.round(self.ask_price, 2), has_ask)
+        bid_size_rows = bid_sizes.tolist()
+        ask_size_rows = ask_sizes.tolist()
+        spreads = _nullable(spread, has_spread)
+        imbalances = _nullable(imbalance, total > 0)
+
+        blocks: list[dict | None] = []
+        for i, ok in enumerate(has_depth.tolist()):
+            if not ok:
+                blocks.append(None)
+                continue
+            blocks.append({
+                "bidPrice": bid_prices[i],
+                "bidSize": bid_size_rows[i],
+                "askPrice": ask_prices[i],
+                "askSize": ask_size_rows[i],
+                "spread": spreads[i],
+                "imbalance": imbalances[i],
+            })
+        return blocks
+
+    def to_dicts(self) -> list[dict]:
+        has_last = ~np.isnan(self.last)
+        has_prev = ~np.isnan(self.prev_close)
+        last_units = np.rint(np.where(has_last, self.last, 0) * SCALE).astype(np.int64)
+        prev_units = np.rint(np.where(has_prev, self.prev_close, 0) * SCALE).astype(np.int64)
+
+        price_cents = _round_half_even(last_units, CENT)
+        prev_cents = _round_half_even(prev_units, CENT)
+
+        has_change = has_last & has_prev
+        delta = last_units - prev_units
+        change_cents = _round_half_even(delta, CENT)
+
+        # changePercent in hundredths of a percent: delta / prev * 100 * 100
+        has_pct = has_change & (prev_units != 0)
+        sign = np.where(prev_units < 0, -1, 1)
+        pct_hundredths = _round_half_even(delta * 10_000 * sign, np.where(has_pct, np.abs(prev_units), 1))
+
+        has_ts = ~np.isnat(self.timestamp)
+        iso = np.datetime_as_string(self.timestamp, unit="s")
+
+        prices = _to_list(price_cents / 100, has_last)
+        prev_closes = _to_list(prev_cents / 100, has_prev)
+        changes = _to_list(change_cents / 100, has_change)
+        pcts = _to_list(pct_hundredths / 100, has_pct)
+        depths = self.depth_blocks()
+
+        out = []
+        for i, present in enumerate(self.present.tolist()):
+            if not present:
+                out.append({"price": None, "change": None, "changePercent": None, "currency": "TWD", "trend": []})
+                continue
+            stamp = f"{iso[i]}+08:00" if has_ts[i] else None
+            trend = []
+            if prev_closes[i] is not None:
+                trend.append({"time": "前收", "close": prev_closes[i]})
+            if prices[i] is not None and stamp:
+                trend.append({"time": stamp[11:16], "close": prices[i]})
+            quote = {
+                "price": prices[i],
+                "change": changes[i],
+                "changePercent": pcts[i],
+                "currency": "TWD",
+                "trend": trend,
+                "timestamp": stamp,
+            }
+            if depths[i] is not None:
+                quote["depth"] = depths[i]
+            out.append(quote)
+        return out
+
+
+def _valid_stamp(value: str) -> bool:
+    try:
+        np.datetime64(value, "s")
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,101 @@
+"""Persisted "seen before?" index for the news jobs.
+
+Each job keeps one small JSON file under data/cache/seen/. It maps a 64-bit
+hash of every published item's canonical URL to the first and last time it
+was seen. `mark` tags each output item with `isNew` and `firstSeenAt`, so
+pushes and pages can act on the delta alone, with no need to load and
+compare the previous output file. Entries not seen for `max_age` seconds are
+evicted when saving, which keeps the file bounded: a few thousand entries at
+most, about 40 bytes each. When a job keeps its previous output because the
+source did not change, `remark_output` re-marks that file so the flags from
+the run that first saw its items do not stay on.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from news_urls import canonical_url
+
+SEEN_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "seen"
+DEFAULT_MAX_AGE = 30 * 86400
+TZ = ZoneInfo("Asia/Taipei")
+
+
+def url_hash(url: str) -> str:
+    return hashlib.blake2b(canonical_url(url).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class SeenSet:
+    def __init__(self, name: str, directory: Path = SEEN_DIR, max_age: float = DEFAULT_MAX_AGE):
+        self.path = Path(directory) / f"{name}.json"
+        self.max_age = max_age
+        # url hash -> [first seen, last seen] in epoch seconds
+        self.entries: dict[str, list[int]] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))["seen"]
+            except (OSError, ValueError, KeyError, TypeError) as exc:
+                print(f"Warning: ignoring unreadable {self.path}: {exc}")
+
+    def mark(self, items: list[dict], now: float | None = None) -> int:
+        """Set `isNew`/`firstSeenAt` on each item in place; returns the number of new ones."""
+        now = int(time.time() if now is None else now)
+        new = 0
+        for item in items:
+            url = (item.get("url") or "").strip()
+            if not url:
+                continue
+            key = url_hash(url)
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = [now, now]
+                new += 1
+            else:
+                entry[1] = now
+            item["isNew"] = entry[0] == now
+            item["firstSeenAt"] = datetime.fromtimestamp(entry[0], TZ).isoformat(timespec="seconds")
+        return new
+
+    def save(self, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        live = {k: v for k, v in self.entries.items() if now - v[1] <= self.max_age}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"seen": live}, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self.entries = live
+
+
+def mark_new(items: list[dict], name: str, directory: Path = SEEN_DIR) -> int:
+    """Best-effort mark-and-save for a job's output items; returns the new count."""
+    seen = SeenSet(name, directory)
+    new = seen.mark(items)
+    try:
+        seen.save()
+    except OSError as exc:
+        print(f"Warning: seen-set {name} not saved: {exc}")
+    return new
+
+
+def remark_output(out_file: Path, name: str, keys: tuple[str, ...], directory: Path = SEEN_DIR) -> None:
+    """Re-mark the item lists under `keys` in a kept output file and rewrite it if the flags changed."""
+    out_file = Path(out_file)
+    try:
+        text = out_file.read_text(encoding="utf-8")
+        data = json.loads(text)
+        items = [item for key in keys for item in data.get(key) or [] if isinstance(item, dict)]
+    except (OSError, ValueError, AttributeError, TypeError) as exc:
+        print(f"Warning: {out_file} not re-marked: {exc}")
+        return
+    # The same item can sit in several lists (e.g. "newsZh" and "news"); it is counted once.
+    data["newCount"] = mark_new(items, name, directory)
+    updated = json.dumps(data, ensure_ascii=False, indent=2)
+    if updated != text:
+        out_file.write_text(updated, encoding="utf-8")
@@ -7,7 +7,6 @@ import argparse
 import json
 import os
 import smtplib
-import subprocess
 from dataclasses import dataclass
 from datetime import datetime
 from html import escape
@@ -18,11 +17,13 @@ from pathlib import Path
 from typing import Iterable, Mapping
 from zoneinfo import ZoneInfo
 
+from notify_line import send_line
+from tw_calendar import is_trading_day
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_PATH = BASE_DIR / "data" / "latest.json"
 ENV_FILE = BASE_DIR / ".env"
 TAIPEI_TZ = ZoneInfo("Asia/Taipei")
-LINE_SCRIPT = BASE_DIR / "scripts" / "notify_line.py"
 QUICKCHART_CREATE_URL = "https://quickchart.io/chart/create"
 
 
@@ -291,14 +292,11 @@ def send_email(cfg: EmailConfig, subject: str, text: str, html: str) -> str:
 
 
 def push_line_notification(summary: str, suggestion: str, rows: list[dict]) -> None:
-    if not LINE_SCRIPT.exists():
-        return
     table = build_line_table(rows)
     message = f"台股收盤通知\n{summary}\n{suggestion}\n\n{table}"
-    cmd = ["python3", str(LINE_SCRIPT), message]
     try:
-        subprocess.run(cmd, check=True)
-    except subprocess.CalledProcessError as exc:
+        send_line(message)
+    except Exception as exc:
         print(f"LINE push failed: {exc}")
 
 
@@ -310,11 +308,17 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--dry-run", action="store_true", help="Print email content instead of sending")
     parser.add_argument("--no-line", action="store_true", help="Skip LINE notification")
     parser.add_argument("--test-line", action="store_true", help="Send LINE notification only")
+    parser.add_argument("--force", action="store_true", help="Send even on a non-trading day")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
+    # A dry run is a preview, so it goes ahead on any day, like --force.
+    if not (args.force or args.dry_run) and not is_trading_day(datetime.now(TAIPEI_TZ).date()):
+        print("Non-trading day (weekend or TWSE holiday); skipping send_daily_email (--force overrides).")
+        return
+
     payload = load_latest()
     updated_at = payload.get("updatedAt", "")
     items = payload.get("items", [])
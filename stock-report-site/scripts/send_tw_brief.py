@@ -12,10 +12,12 @@ from pathlib import Path
 from typing import Any
 from zoneinfo import ZoneInfo
 
+from notify_line import send_line
+from tw_calendar import is_trading_day
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_PATH = BASE_DIR / "data" / "latest.json"
 UPDATE_SCRIPT = BASE_DIR / "scripts" / "update_report.py"
-LINE_SCRIPT = BASE_DIR / "scripts" / "notify_line.py"
 TAIPEI_TZ = ZoneInfo("Asia/Taipei")
 
 SYMBOLS = {
@@ -57,7 +59,11 @@ def format_tsmc_line(item: dict[str, Any]) -> str:
     change = item["change"]
     prev_close = price - change
     points = [pt.get("close") for pt in item.get("trend", []) if isinstance(pt.get("close"), (int, float))]
-    if points:
+    if isinstance(item.get("dayLow"), (int, float)) and isinstance(item.get("dayHigh"), (int, float)):
+        # Session extremes tracked by the tick store, not just the sampled trend points.
+        low = item["dayLow"]
+        high = item["dayHigh"]
+    elif points:
         low = min(points)
         high = max(points)
     else:
@@ -85,18 +91,19 @@ def build_summary(index_item: dict[str, Any]) -> str:
 
 
 def should_skip(today: date) -> bool:
-    return today.weekday() >= 5  # Sat/Sun
+    return not is_trading_day(today)  # weekends, TWSE holidays and typhoon closures
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(description="Send Taiwan brief to LINE")
     parser.add_argument("--dry-run", action="store_true", help="Print message without sending to LINE")
     parser.add_argument("--skip-update", action="store_true", help="Do not refresh latest data before sending")
-    args = parser.parse_args()
+    parser.add_argument("--force", action="store_true", help="Send even on a non-trading day")
+    args = parser.parse_args(argv)
 
     today = datetime.now(TAIPEI_TZ).date()
-    if should_skip(today):
-        print("Non-trading day (weekend); skipping send_tw_brief.")
+    if not (args.force or args.dry_run) and should_skip(today):
+        print("Non-trading day (weekend or TWSE holiday); skipping send_tw_brief (--force overrides).")
         return
 
     if not args.skip_update and UPDATE_SCRIPT.exists():
@@ -132,7 +139,7 @@ def main() -> None:
     if args.dry_run:
         return
 
-    subprocess.run([sys.executable, str(LINE_SCRIPT), message], check=True)
+    send_line(message)
 
 
 if __name__ == "__main__":
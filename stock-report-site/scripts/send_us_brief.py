@@ -12,10 +12,11 @@ from pathlib import Path
 from typing import Any
 from zoneinfo import ZoneInfo
 
+from notify_line import send_line
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_PATH = BASE_DIR / "data" / "us_latest.json"
 UPDATE_SCRIPT = BASE_DIR / "scripts" / "update_us_report.py"
-LINE_SCRIPT = BASE_DIR / "scripts" / "notify_line.py"
 TAIPEI_TZ = ZoneInfo("Asia/Taipei")
 
 SYMBOLS = {
@@ -66,11 +67,11 @@ def is_stale(updated_at: datetime, now: datetime) -> bool:
     return (now - updated_at) > timedelta(hours=18)
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(description="Send US brief to LINE")
     parser.add_argument("--dry-run", action="store_true", help="Print message without sending")
     parser.add_argument("--skip-update", action="store_true", help="Do not refresh data before sending")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if not args.skip_update and UPDATE_SCRIPT.exists():
         subprocess.run([sys.executable, str(UPDATE_SCRIPT)], check=True)
@@ -113,7 +114,7 @@ def main() -> None:
     if args.dry_run:
         return
 
-    subprocess.run([sys.executable, str(LINE_SCRIPT), message], check=True)
+    send_line(message)
 
 
 if __name__ == "__main__":
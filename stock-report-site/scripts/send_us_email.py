@@ -7,7 +7,6 @@ import argparse
 import json
 import os
 import smtplib
-import subprocess
 from dataclasses import dataclass
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
@@ -16,11 +15,12 @@ from pathlib import Path
 from typing import Iterable, Mapping
 from zoneinfo import ZoneInfo
 
+from notify_line import send_line
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_PATH = BASE_DIR / "data" / "us_latest.json"
 ENV_FILE = BASE_DIR / ".env"
 TAIPEI_TZ = ZoneInfo("Asia/Taipei")
-LINE_SCRIPT = BASE_DIR / "scripts" / "notify_line.py"
 
 REPORT_TITLE = "美股每日報告"
 SUMMARY_PREFIX = "【美股摘要】"
@@ -221,14 +221,11 @@ def send_email(cfg: EmailConfig, subject: str, text: str, html: str) -> str:
 
 
 def push_line_notification(summary: str, suggestion: str, rows: list[dict]) -> None:
-    if not LINE_SCRIPT.exists():
-        return
     table = build_line_table(rows)
     message = f"{REPORT_TITLE}\n{summary}\n{suggestion}\n\n{table}"
-    cmd = ["python3", str(LINE_SCRIPT), message]
     try:
-        subprocess.run(cmd, check=True)
-    except subprocess.CalledProcessError as exc:
+        send_line(message)
+    except Exception as exc:
         print(f"LINE push failed: {exc}")
 
 
@@ -0,0 +1,355 @@
+"""Append-only intraday tick store for TWSE MIS snapshots.
+
+Each trading day gets its own directory and each channel its own file of
+fixed-width binary records, so appends are a single write and reads index
+straight into a memory map instead of scanning the whole day. Best-five
+order book snapshots go to a parallel `.depth` file and completed OHLCV
+bars to `.bar60` / `.bar300` files with the same layout rules.
+"""
+
+from __future__ import annotations
+
+import math
+import mmap
+import struct
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+TZ = ZoneInfo("Asia/Taipei")
+
+# epoch seconds, last, prev close, session high, session low, trade volume, cumulative volume
+RECORD = struct.Struct("<qddddqq")
+# epoch seconds, 5 bid prices, 5 bid sizes, 5 ask prices, 5 ask sizes
+DEPTH_LEVELS = 5
+DEPTH_RECORD = struct.Struct(f"<q{DEPTH_LEVELS}d{DEPTH_LEVELS}q{DEPTH_LEVELS}d{DEPTH_LEVELS}q")
+# bar start (epoch seconds), open, high, low, close, volume
+BAR_RECORD = struct.Struct("<qddddq")
+# Append handles kept open at once. Each symbol has up to four files per day, so a
+# large watchlist would otherwise exhaust the process's descriptor limit (256 under launchd).
+MAX_OPEN_HANDLES = 64
+NAN = float("nan")
+
+
+class Tick(NamedTuple):
+    ts: int
+    last: float
+    prev_close: float
+    high: float
+    low: float
+    trade_volume: int
+    volume: int
+
+    @classmethod
+    def unpack(cls, buffer, offset: int = 0) -> "Tick":
+        return cls(*RECORD.unpack_from(buffer, offset))
+
+    @property
+    def time(self) -> datetime:
+        return datetime.fromtimestamp(self.ts, tz=TZ)
+
+
+class Bar(NamedTuple):
+    start: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+
+    @classmethod
+    def unpack(cls, buffer, offset: int = 0) -> "Bar":
+        return cls(*BAR_RECORD.unpack_from(buffer, offset))
+
+    @property
+    def time(self) -> datetime:
+        return datetime.fromtimestamp(self.start, tz=TZ)
+
+
+class Depth(NamedTuple):
+    ts: int
+    bid_price: tuple[float, ...]
+    bid_size: tuple[int, ...]
+    ask_price: tuple[float, ...]
+    ask_size: tuple[int, ...]
+
+    @classmethod
+    def unpack(cls, buffer, offset: int = 0) -> "Depth":
+        values = DEPTH_RECORD.unpack_from(buffer, offset)
+        n = DEPTH_LEVELS
+        return cls(
+            ts=values[0],
+            bid_price=values[1 : 1 + n],
+            bid_size=values[1 + n : 1 + 2 * n],
+            ask_price=values[1 + 2 * n : 1 + 3 * n],
+            ask_size=values[1 + 3 * n :],
+        )
+
+    @property
+    def spread(self) -> float:
+        return self.ask_price[0] - self.bid_price[0]
+
+    @property
+    def imbalance(self) -> float:
+        bid, ask = sum(self.bid_size), sum(self.ask_size)
+        return (bid - ask) / (bid + ask) if bid + ask else NAN
+
+
+def _to_float(value) -> float:
+    if value in (None, "", "-", "+"):
+        return NAN
+    try:
+        return float(str(value).replace(",", "").strip())
+    except ValueError:
+        return NAN
+
+
+def _to_int(value) -> int:
+    parsed = _to_float(value)
+    return 0 if math.isnan(parsed) else int(parsed)
+
+
+def _entry_timestamp(entry: dict) -> int | None:
+    date_str = entry.get("d")
+    time_str = entry.get("t")
+    if not date_str or not time_str:
+        return None
+    try:
+        dt = datetime.strptime(f"{date_str} {time_str}", "%Y%m%d %H:%M:%S").replace(tzinfo=TZ)
+    except ValueError:
+        return None
+    return int(dt.timestamp())
+
+
+class TickStore:
+    def __init__(self, root: Path, max_open: int = MAX_OPEN_HANDLES):
+        self.root = Path(root)
+        self.max_open = max(1, max_open)
+        # Least recently written first; the oldest is closed once max_open is reached.
+        self._handles: OrderedDict[Path, object] = OrderedDict()
+        self._tails: dict[Path, Tick | Depth | None] = {}
+        self._day: str | None = None
+
+    def path_for(self, day: str, channel: str, kind: str = "ticks") -> Path:
+        return self.root / day / f"{channel}.{kind}"
+
+    def count(self, day: str, channel: str) -> int:
+        return self._count(self.path_for(day, channel), RECORD)
+
+    def last(self, day: str, channel: str) -> Tick | None:
+        path = self.path_for(day, channel)
+        if path not in self._tails:
+            self._tails[path] = self._read_tail(path, RECORD, Tick.unpack)
+        return self._tails[path]
+
+    def tick_at(self, day: str, channel: str, index: int) -> Tick | None:
+        """Random access by record index; negative indices count from the end."""
+        path = self.path_for(day, channel)
+        total = self.count(day, channel)
+        if index < 0:
+            index += total
+        if not 0 <= index < total:
+            return None
+        with open(path, "rb") as fh:
+            fh.seek(index * RECORD.size)
+            return Tick.unpack(fh.read(RECORD.size))
+
+    def last_depth(self, day: str, channel: str) -> Depth | None:
+        path = self.path_for(day, channel, "depth")
+        if path not in self._tails:
+            self._tails[path] = self._read_tail(path, DEPTH_RECORD, Depth.unpack)
+        return self._tails[path]
+
+    def append(self, channel: str, entry: dict) -> Tick | None:
+        """Record one MIS entry; returns the stored tick, or None if skipped."""
+        day = entry.get("d")
+        ts = _entry_timestamp(entry)
+        last = _to_float(entry.get("z"))
+        if not day or ts is None or math.isnan(last):
+            return None
+
+        self._roll_day(day)
+        previous = self.last(day, channel)
+        volume = _to_int(entry.get("v"))
+        if previous is not None and previous.ts == ts and previous.volume == volume:
+            return None
+
+        high = low = last
+        session_high = _to_float(entry.get("h"))
+        session_low = _to_float(entry.get("l"))
+        if not math.isnan(session_high):
+            high = max(high, session_high)
+        if not math.isnan(session_low):
+            low = min(low, session_low)
+        if previous is not None:
+            high = max(high, previous.high)
+            low = min(low, previous.low)
+
+        tick = Tick(
+            ts=ts,
+            last=last,
+            prev_close=_to_float(entry.get("y")),
+            high=high,
+            low=low,
+            trade_volume=_to_int(entry.get("tv")),
+            volume=volume,
+        )
+        path = self.path_for(day, channel)
+        self._write(path, RECORD, RECORD.pack(*tick))
+        self._tails[path] = tick
+        return tick
+
+    def append_depth(
+        self,
+        channel: str,
+        entry: dict,
+        levels: tuple[list, list, list, list],
+    ) -> Depth | None:
+        """Record the best-five book parsed from `entry`; skipped if unchanged since the last record."""
+        day = entry.get("d")
+        ts = _entry_timestamp(entry)
+        if not day or ts is None:
+            return None
+        self._roll_day(day)
+
+        bid_price, bid_size, ask_price, ask_size = (tuple(level) for level in levels)
+        depth = Depth(ts=ts, bid_price=bid_price, bid_size=bid_size, ask_price=ask_price, ask_size=ask_size)
+        previous = self.last_depth(day, channel)
+        if previous is not None and _same_book(previous, depth):
+            return None
+
+        path = self.path_for(day, channel, "depth")
+        self._write(path, DEPTH_RECORD, DEPTH_RECORD.pack(ts, *bid_price, *bid_size, *ask_price, *ask_size))
+        self._tails[path] = depth
+        return depth
+
+    def append_snapshot(self, quotes: dict[str, dict]) -> int:
+        written = 0
+        for channel, entry in quotes.items():
+            if self.append(channel, entry) is not None:
+                written += 1
+        return written
+
+    def append_bar(self, channel: str, interval: int, bar: Bar) -> None:
+        day = bar.time.strftime("%Y%m%d")
+        self._roll_day(day)
+        self._write(self.path_for(day, channel, f"bar{interval}"), BAR_RECORD, BAR_RECORD.pack(*bar))
+
+    def recent_bars(self, day: str, channel: str, interval: int, count: int) -> list[Bar]:
+        path = self.path_for(day, channel, f"bar{interval}")
+        total = self._count(path, BAR_RECORD)
+        if total == 0 or count <= 0:
+            return []
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), total * BAR_RECORD.size, access=mmap.ACCESS_READ) as mm:
+            return [Bar.unpack(mm, i * BAR_RECORD.size) for i in range(max(0, total - count), total)]
+
+    def index_of(self, day: str, channel: str, since_ts: int) -> int:
+        """Index of the first tick with ts >= since_ts (binary search over the mmap)."""
+        path = self.path_for(day, channel)
+        total = self.count(day, channel)
+        if total == 0:
+            return 0
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), total * RECORD.size, access=mmap.ACCESS_READ) as mm:
+            lo, hi = 0, total
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if Tick.unpack(mm, mid * RECORD.size).ts < since_ts:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+
+    def ticks_between(self, day: str, channel: str, start: int, stop: int) -> list[Tick]:
+        path = self.path_for(day, channel)
+        stop = min(stop, self.count(day, channel))
+        if start >= stop:
+            return []
+        with open(path, "rb") as fh:
+            fh.seek(start * RECORD.size)
+            data = fh.read((stop - start) * RECORD.size)
+        return [Tick.unpack(data, i * RECORD.size) for i in range(stop - start)]
+
+    def series(self, day: str, channel: str, points: int) -> list[Tick]:
+        """Return up to `points` ticks spread evenly across the day, always ending on the latest."""
+        return self._sample(self.path_for(day, channel), RECORD, points, Tick.unpack)
+
+    def depth_series(self, day: str, channel: str, points: int) -> list[Depth]:
+        return self._sample(self.path_for(day, channel, "depth"), DEPTH_RECORD, points, Depth.unpack)
+
+    def close(self) -> None:
+        for handle in self._handles.values():
+            handle.close()
+        self._handles.clear()
+
+    def _roll_day(self, day: str) -> None:
+        # Only roll forward: a late write for an earlier day (e.g. its final bar) must not
+        # close today's handles. Day strings are YYYYMMDD, so they compare in date order.
+        if self._day is None or day > self._day:
+            # A resident poller rolls into a new session; drop the previous day's handles.
+            self.close()
+            self._tails.clear()
+            self._day = day
+
+    def _write(self, path: Path, record: struct.Struct, payload: bytes) -> None:
+        handle = self._handles.get(path)
+        if handle is not None:
+            self._handles.move_to_end(path)
+        else:
+            while len(self._handles) >= self.max_open:
+                self._handles.popitem(last=False)[1].close()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handle = open(path, "ab")
+            size = handle.tell()
+            if size % record.size:
+                handle.truncate(size - size % record.size)
+                handle.seek(0, 2)
+            self._handles[path] = handle
+        handle.write(payload)
+        handle.flush()
+
+    @staticmethod
+    def _count(path: Path, record: struct.Struct) -> int:
+        try:
+            return path.stat().st_size // record.size
+        except FileNotFoundError:
+            return 0
+
+    def _sample(self, path: Path, record: struct.Struct, points: int, unpack) -> list:
+        total = self._count(path, record)
+        if total == 0 or points <= 0:
+            return []
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), total * record.size, access=mmap.ACCESS_READ) as mm:
+            if total <= points:
+                indices = range(total)
+            elif points == 1:
+                indices = [total - 1]
+            else:
+                step = (total - 1) / (points - 1)
+                indices = sorted({round(i * step) for i in range(points)})
+            return [unpack(mm, i * record.size) for i in indices]
+
+    @staticmethod
+    def _read_tail(path: Path, record: struct.Struct, unpack):
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return None
+        # Ignore a torn trailing record left by an interrupted write.
+        usable = size - size % record.size
+        if usable == 0:
+            return None
+        with open(path, "rb") as fh:
+            fh.seek(usable - record.size)
+            return unpack(fh.read(record.size))
+
+
+def _same_book(a: Depth, b: Depth) -> bool:
+    # NaN marks an empty level; compare through repr so NaN == NaN.
+    return (
+        a.bid_size == b.bid_size
+        and a.ask_size == b.ask_size
+        and repr(a.bid_price) == repr(b.bid_price)
+        and repr(a.ask_price) == repr(b.ask_price)
+    )
@@ -0,0 +1,151 @@
+"""TWSE trading calendar shared by the TW pollers, briefs and emails.
+
+Market holidays are precomputed per year from TWSE's published schedule, so
+every lookup is a set/dict hit and no script needs the network to know the
+market is shut. Ad-hoc closures (typhoon days) go in
+`data/twse_closures.json` as a list of "YYYY-MM-DD" strings and are picked
+up on the next start. Bump CALENDAR_VERSION whenever the tables change.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+TZ = ZoneInfo("Asia/Taipei")
+CALENDAR_VERSION = "2026.1"
+SESSION_OPEN = time(9, 0)
+SESSION_CLOSE = time(13, 30)
+CLOSURES_FILE = Path(__file__).resolve().parent.parent / "data" / "twse_closures.json"
+
+# Weekday market closures, including the no-trading settlement days before Lunar New Year.
+HOLIDAYS = {
+    2025: [
+        "2025-01-01",
+        "2025-01-23", "2025-01-24", "2025-01-27", "2025-01-28",
+        "2025-01-29", "2025-01-30", "2025-01-31",
+        "2025-02-28",
+        "2025-04-03", "2025-04-04",
+        "2025-05-01",
+        "2025-05-30",
+        "2025-09-29",
+        "2025-10-06",
+        "2025-10-10",
+        "2025-10-24",
+        "2025-12-25",
+    ],
+    2026: [
+        "2026-01-01",
+        "2026-02-12", "2026-02-13", "2026-02-16", "2026-02-17",
+        "2026-02-18", "2026-02-19", "2026-02-20",
+        "2026-02-27",
+        "2026-04-03", "2026-04-06",
+        "2026-05-01",
+        "2026-06-19",
+        "2026-09-25",
+        "2026-09-28",
+        "2026-10-09",
+        "2026-10-26",
+        "2026-12-25",
+    ],
+}
+
+
+def _load_closures(path: Path) -> set[date]:
+    if not path.exists():
+        return set()
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        print(f"Warning: ignoring unreadable {path}: {exc}")
+        return set()
+    closures = set()
+    for value in raw if isinstance(raw, list) else []:
+        try:
+            closures.add(date.fromisoformat(value))
+        except (TypeError, ValueError):
+            continue
+    return closures
+
+
+def _build_tables(closures: set[date]) -> tuple[int, int, frozenset[int], dict[int, int]]:
+    first_year, last_year = min(HOLIDAYS), max(HOLIDAYS)
+    closed = {date.fromisoformat(d) for days in HOLIDAYS.values() for d in days} | closures
+    start = date(first_year, 1, 1).toordinal()
+    end = date(last_year, 12, 31).toordinal()
+
+    trading = frozenset(
+        o for o in range(start, end + 1) if date.fromordinal(o).weekday() < 5 and date.fromordinal(o) not in closed
+    )
+    # ordinal -> first trading-day ordinal on or after it
+    next_trading: dict[int, int] = {}
+    upcoming = None
+    for o in range(end, start - 1, -1):
+        if o in trading:
+            upcoming = o
+        if upcoming is not None:
+            next_trading[o] = upcoming
+    return start, end, trading, next_trading
+
+
+_START, _END, _TRADING, _NEXT_TRADING = _build_tables(_load_closures(CLOSURES_FILE))
+# Years already warned about as missing from HOLIDAYS, so a long-running poller logs each once.
+_warned_years: set[int] = set()
+
+
+def _covered(day: date) -> bool:
+    return _START <= day.toordinal() <= _END
+
+
+def _warn_uncovered(day: date) -> None:
+    if day.year in _warned_years:
+        return
+    _warned_years.add(day.year)
+    print(
+        f"Warning: {day} is outside the TWSE holiday tables "
+        f"({date.fromordinal(_START)}..{date.fromordinal(_END)}); only weekends count as closed. "
+        f"Add {day.year} to tw_calendar.HOLIDAYS."
+    )
+
+
+def is_trading_day(day: date) -> bool:
+    if _covered(day):
+        return day.toordinal() in _TRADING
+    # Outside the published tables we only know about weekends.
+    _warn_uncovered(day)
+    return day.weekday() < 5
+
+
+def next_trading_day(day: date) -> date:
+    """First trading day on or after `day`."""
+    ordinal = day.toordinal()
+    if ordinal in _NEXT_TRADING:
+        return date.fromordinal(_NEXT_TRADING[ordinal])
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def session_bounds(day: date) -> tuple[datetime, datetime] | None:
+    if not is_trading_day(day):
+        return None
+    return (
+        datetime.combine(day, SESSION_OPEN, tzinfo=TZ),
+        datetime.combine(day, SESSION_CLOSE, tzinfo=TZ),
+    )
+
+
+def is_trading_window(now: datetime) -> bool:
+    now = now.astimezone(TZ)
+    return is_trading_day(now.date()) and SESSION_OPEN <= now.time() <= SESSION_CLOSE
+
+
+def next_session_start(now: datetime) -> datetime:
+    """Open of the next session that has not started yet."""
+    now = now.astimezone(TZ)
+    day = now.date()
+    if now.time() >= SESSION_OPEN:
+        day += timedelta(days=1)
+    return datetime.combine(next_trading_day(day), SESSION_OPEN, tzinfo=TZ)
@@ -1,13 +1,29 @@
 #!/usr/bin/env python3
 import json
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 from zoneinfo import ZoneInfo
 from xml.etree import ElementTree as ET
 from urllib.parse import quote_plus
-from urllib.request import Request, urlopen
+
+from fetch_pool import fetch_in_order
+from http_cache import HttpCache, previous_ok
+from near_dupes import NearDupIndex, cluster_items
+from news_archive import archive_items
+from news_urls import canonical_url
+from seen_set import mark_new, remark_output
+from url_resolver import SHORTLIST_SLACK, resolve_urls, shortlist
 
 TZ = ZoneInfo("Asia/Taipei")
+REQUEST_TIMEOUT = 20
+MAX_WORKERS = 6
+# Whole-run budget for the RSS queries; anything slower is reported in `errors`.
+FETCH_DEADLINE = 45
+EDITIONS = {
+    "zh": ("zh-TW", "TW", "TW:zh-Hant"),
+    "en": ("en-US", "US", "US:en"),
+}
 
 QUERIES_ZH = [
     "咖啡 產業",
@@ -26,11 +42,12 @@ QUERIES_EN = [
 ]
 
 
-def fetch_google_news_rss(query: str, hl: str, gl: str, ceid: str):
+def fetch_google_news_rss(cache: HttpCache, query: str, hl: str, gl: str, ceid: str, timeout: float = REQUEST_TIMEOUT):
     url = f"https://news.google.com/rss/search?q={quote_plus(query)}&hl={hl}&gl={gl}&ceid={ceid}"
-    req = Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    with urlopen(req, timeout=20) as resp:
-        text = resp.read().decode("utf-8", errors="ignore")
+    return cache.fetch(url, timeout=timeout)
+
+
+def parse_google_news_rss(text: str):
     root = ET.fromstring(text)
 
     items = []
@@ -50,7 +67,7 @@ def normalize_and_dedupe(items, lang):
         url = (x.get("url") or "").strip()
         if not title or not url:
             continue
-        key = (title.lower(), url)
+        key = (title.lower(), canonical_url(url))
         if key in seen:
             continue
         seen.add(key)
@@ -78,20 +95,58 @@ def main():
     zh_items, en_items = [], []
     errors = []
 
-    for q in QUERIES_ZH:
-        try:
-            zh_items.extend(fetch_google_news_rss(q, "zh-TW", "TW", "TW:zh-Hant"))
-        except Exception as e:
-            errors.append(f"zh:{q}: {e}")
+    # All queries run concurrently; results are merged back in query order.
+    jobs = [("zh", q) for q in QUERIES_ZH] + [("en", q) for q in QUERIES_EN]
+    cache = HttpCache()
+    results = fetch_in_order(
+        [partial(fetch_google_news_rss, cache, q, *EDITIONS[lang]) for lang, q in jobs],
+        request_timeout=REQUEST_TIMEOUT,
+        max_workers=MAX_WORKERS,
+        deadline=FETCH_DEADLINE,
+    )
+    responses = []
+    for (lang, q), (resp, error) in zip(jobs, results):
+        if error is not None:
+            errors.append(f"{lang}:{q}: {error}")
+            continue
+        responses.append((lang, q, resp))
 
-    for q in QUERIES_EN:
+    base = Path(__file__).resolve().parent.parent
+    out_file = base / "data" / "coffee_news.json"
+    # Every feed answered 304 (or with an identical body): nothing to parse, only the
+    # new-item flags in the kept file are refreshed.
+    if not errors and not any(resp.changed for _, _, resp in responses) and previous_ok(out_file):
+        remark_output(out_file, "coffee_news", ("newsZh", "newsEn", "news"))
+        print(f"Feeds unchanged; kept {out_file}")
+        return
+
+    for lang, q, resp in responses:
         try:
-            en_items.extend(fetch_google_news_rss(q, "en-US", "US", "US:en"))
-        except Exception as e:
-            errors.append(f"en:{q}: {e}")
-
-    news_zh = normalize_and_dedupe(zh_items, "zh")[:5]
-    news_en = normalize_and_dedupe(en_items, "en")[:5]
+            items = parse_google_news_rss(resp.text())
+        except ET.ParseError as e:
+            errors.append(f"{lang}:{q}: {e}")
+            continue
+        (zh_items if lang == "zh" else en_items).extend(items)
+
+    deduped_zh = normalize_and_dedupe(zh_items, "zh")
+    deduped_en = normalize_and_dedupe(en_items, "en")
+    # Collapse the same story reported by several outlets into one slot.
+    clusters = NearDupIndex(base / "data" / "cache" / "coffee_clusters.json")
+    top_zh = cluster_items(deduped_zh, clusters)[: 5 + SHORTLIST_SLACK]
+    top_en = cluster_items(deduped_en, clusters)[: 5 + SHORTLIST_SLACK]
+    try:
+        clusters.save()
+    except OSError as exc:
+        print(f"Warning: story clusters not saved: {exc}")
+
+    # Swap Google News redirect links for the publisher's own URL, only for stories that can be shown.
+    resolved = resolve_urls([x["url"] for x in top_zh + top_en])
+    for x in deduped_zh + deduped_en + top_zh + top_en:
+        x["url"] = resolved.get(x["url"], x["url"])
+    archive_items(deduped_zh + deduped_en, "coffee_news")
+    news_zh = shortlist(top_zh, 5)
+    news_en = shortlist(top_en, 5)
+    new_count = mark_new(news_zh + news_en, "coffee_news")
 
     out = {
         "updatedAt": now,
@@ -100,12 +155,11 @@ def main():
         "newsZh": news_zh,
         "newsEn": news_en,
         "news": news_zh + news_en,
+        "newCount": new_count,
         "ok": len(news_zh) + len(news_en) > 0,
         "errors": errors or None,
     }
 
-    base = Path(__file__).resolve().parent.parent
-    out_file = base / "data" / "coffee_news.json"
     out_file.parent.mkdir(parents=True, exist_ok=True)
     out_file.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"Updated {out_file}: zh={len(news_zh)} en={len(news_en)}")
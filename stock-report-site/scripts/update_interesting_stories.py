@@ -2,13 +2,30 @@
 import json
 import re
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 from urllib.parse import quote_plus
-from urllib.request import Request, urlopen
 from xml.etree import ElementTree as ET
 from zoneinfo import ZoneInfo
 
+from article_summary import article_summaries, enabled as summaries_enabled
+from fetch_pool import fetch_in_order
+from http_cache import HttpCache, previous_ok
+from near_dupes import NearDupIndex, cluster_items
+from news_archive import archive_items
+from news_urls import canonical_url
+from seen_set import mark_new, remark_output
+from url_resolver import SHORTLIST_SLACK, resolve_urls, shortlist
+
 TZ = ZoneInfo("Asia/Taipei")
+REQUEST_TIMEOUT = 20
+MAX_WORKERS = 6
+# Whole-run budget for the RSS queries; anything slower is reported in `errors`.
+FETCH_DEADLINE = 45
+EDITIONS = {
+    "zh": ("zh-TW", "TW", "TW:zh-Hant"),
+    "en": ("en-US", "US", "US:en"),
+}
 
 QUERIES_ZH = [
     "日常生活 有趣故事",
@@ -33,11 +50,12 @@ QUERIES_EN = [
 ]
 
 
-def fetch_google_news_rss(query: str, hl: str, gl: str, ceid: str):
+def fetch_google_news_rss(cache: HttpCache, query: str, hl: str, gl: str, ceid: str, timeout: float = REQUEST_TIMEOUT):
     url = f"https://news.google.com/rss/search?q={quote_plus(query)}&hl={hl}&gl={gl}&ceid={ceid}"
-    req = Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    with urlopen(req, timeout=20) as resp:
-        text = resp.read().decode("utf-8", errors="ignore")
+    return cache.fetch(url, timeout=timeout)
+
+
+def parse_google_news_rss(text: str):
     root = ET.fromstring(text)
 
     items = []
@@ -71,7 +89,7 @@ def normalize_and_dedupe(items, lang: str):
         desc = clip(x.get("description", ""), 300)
         if not title or not url:
             continue
-        key = (title.lower(), url)
+        key = (title.lower(), canonical_url(url))
         if key in seen:
             continue
         seen.add(key)
@@ -114,23 +132,64 @@ def main():
     zh_raw = []
     en_raw = []
 
-    for q in QUERIES_ZH:
-        try:
-            zh_raw.extend(fetch_google_news_rss(q, "zh-TW", "TW", "TW:zh-Hant"))
-        except Exception as e:
-            errors.append(f"zh:{q}: {e}")
-
-    for q in QUERIES_EN:
-        try:
-            en_raw.extend(fetch_google_news_rss(q, "en-US", "US", "US:en"))
-        except Exception as e:
-            errors.append(f"en:{q}: {e}")
-
-    stories_zh = normalize_and_dedupe(zh_raw, "zh")[:5]
-    stories_en = normalize_and_dedupe(en_raw, "en")[:5]
+    # All queries run concurrently; results are merged back in query order.
+    jobs = [("zh", q) for q in QUERIES_ZH] + [("en", q) for q in QUERIES_EN]
+    cache = HttpCache()
+    results = fetch_in_order(
+        [partial(fetch_google_news_rss, cache, q, *EDITIONS[lang]) for lang, q in jobs],
+        request_timeout=REQUEST_TIMEOUT,
+        max_workers=MAX_WORKERS,
+        deadline=FETCH_DEADLINE,
+    )
+    responses = []
+    for (lang, q), (resp, error) in zip(jobs, results):
+        if error is not None:
+            errors.append(f"{lang}:{q}: {error}")
+            continue
+        responses.append((lang, q, resp))
 
     base = Path(__file__).resolve().parent.parent
     out_file = base / "data" / "interesting_stories.json"
+    # Every feed answered 304 (or with an identical body): nothing to parse, only the
+    # new-item flags in the kept file are refreshed.
+    if not errors and not any(resp.changed for _, _, resp in responses) and previous_ok(out_file):
+        remark_output(out_file, "interesting_stories", ("storiesZh", "storiesEn", "stories"))
+        print(f"Feeds unchanged; kept {out_file}")
+        return
+
+    for lang, q, resp in responses:
+        try:
+            items = parse_google_news_rss(resp.text())
+        except ET.ParseError as e:
+            errors.append(f"{lang}:{q}: {e}")
+            continue
+        (zh_raw if lang == "zh" else en_raw).extend(items)
+
+    deduped_zh = normalize_and_dedupe(zh_raw, "zh")
+    deduped_en = normalize_and_dedupe(en_raw, "en")
+    # Collapse the same story reported by several outlets into one slot.
+    clusters = NearDupIndex(base / "data" / "cache" / "interesting_stories_clusters.json")
+    top_zh = cluster_items(deduped_zh, clusters)[: 5 + SHORTLIST_SLACK]
+    top_en = cluster_items(deduped_en, clusters)[: 5 + SHORTLIST_SLACK]
+    try:
+        clusters.save()
+    except OSError as exc:
+        print(f"Warning: story clusters not saved: {exc}")
+
+    # Swap Google News redirect links for the publisher's own URL, only for stories that can be shown.
+    resolved = resolve_urls([x["url"] for x in top_zh + top_en])
+    for x in deduped_zh + deduped_en + top_zh + top_en:
+        x["url"] = resolved.get(x["url"], x["url"])
+    archive_items(deduped_zh + deduped_en, "interesting_stories")
+    stories_zh = shortlist(top_zh, 5)
+    stories_en = shortlist(top_en, 5)
+    if summaries_enabled():
+        # The RSS description is usually just the headline again; prefer the article's own lead.
+        found = article_summaries([s["url"] for s in stories_zh + stories_en])
+        for story in stories_zh + stories_en:
+            if story["url"] in found:
+                story["summaryZh" if story["lang"] == "zh" else "summaryEn"] = found[story["url"]]
+
     old, old_zh, old_en = load_old(out_file)
 
     if not stories_zh:
@@ -139,6 +198,8 @@ def main():
         stories_en = old_en[:5]
 
     stories = stories_zh + stories_en
+    # Stories carried over from the old file were seen before, so they come out not new.
+    new_count = mark_new(stories, "interesting_stories")
 
     out = {
         "updatedAt": now,
@@ -146,6 +207,7 @@ def main():
         "storiesZh": stories_zh,
         "storiesEn": stories_en,
         "stories": stories,
+        "newCount": new_count,
         "ok": len(stories) > 0,
         "errors": errors or None,
     }
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
+import argparse
 import json
+import os
 import time as time_module
-from datetime import datetime, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
 from typing import Dict, List
@@ -9,6 +12,12 @@ from zoneinfo import ZoneInfo
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+
+from bar_builder import INTERVAL_LABELS, BarBuilder
+from quote_batch import QuoteBatch
+from tick_store import TickStore
+from tw_calendar import SESSION_CLOSE, SESSION_OPEN, is_trading_day, is_trading_window, next_session_start
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -20,6 +29,15 @@ MIS_HEADERS = {
     "Accept": "application/json, text/javascript, */*; q=0.01",
     "Accept-Language": "zh-TW,zh;q=0.9,en;q=0.8",
 }
+DEFAULT_POLL_SECONDS = 5.0
+# MIS publishes the closing-auction price a few seconds after 13:30, so the daemon keeps polling this long.
+CLOSE_GRACE = timedelta(minutes=3)
+TREND_POINTS = 60
+# MIS rejects very long query strings; keep each ex_ch well under common 2 KB URL limits.
+MAX_EX_CH_CHARS = 1500
+MAX_CHANNELS_PER_REQUEST = 100
+DEFAULT_FETCH_WORKERS = 4
+WATCHLIST_FILE = Path(__file__).resolve().parent.parent / "data" / "tw_watchlist.json"
 
 ASSETS = [
     {"label": "加權指數", "symbol": "^TWII", "type": "Index", "channel": "tse_t00.tw"},
@@ -32,6 +50,70 @@ ASSETS = [
 ]
 
 
+def channel_for_symbol(symbol: str) -> str | None:
+    code, _, suffix = symbol.strip().partition(".")
+    suffix = suffix.upper()
+    if not code:
+        return None
+    if suffix == "TW":
+        return f"tse_{code.lower()}.tw"
+    if suffix == "TWO":
+        return f"otc_{code.lower()}.tw"
+    return None
+
+
+def load_watchlist(path: Path | None = None) -> List[dict]:
+    path = path or WATCHLIST_FILE
+    if not path.exists():
+        return ASSETS
+
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    entries = raw.get("assets", []) if isinstance(raw, dict) else raw
+
+    assets = []
+    seen = set()
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"symbol": entry}
+        symbol = (entry.get("symbol") or "").strip()
+        channel = entry.get("channel") or channel_for_symbol(symbol)
+        if not channel or channel in seen:
+            continue
+        seen.add(channel)
+        assets.append({
+            "label": entry.get("label") or symbol,
+            "symbol": symbol or channel,
+            "type": entry.get("type") or "Stock",
+            "channel": channel,
+        })
+    if not assets:
+        raise ValueError(f"Watchlist {path} has no usable entries")
+    return assets
+
+
+def chunk_channels(
+    channels: List[str],
+    max_chars: int = MAX_EX_CH_CHARS,
+    max_channels: int = MAX_CHANNELS_PER_REQUEST,
+) -> List[List[str]]:
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    length = 0
+    for channel in channels:
+        # "|" is percent-encoded to "%7C" in the query string.
+        extra = len(channel) + (3 if current else 0)
+        if current and (length + extra > max_chars or len(current) >= max_channels):
+            chunks.append(current)
+            current, length = [], 0
+            extra = len(channel)
+        current.append(channel)
+        length += extra
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 def parse_decimal(value) -> Decimal | None:
     if value in (None, "", "-", "+"):
         return None
@@ -63,21 +145,26 @@ def parse_timestamp(date_str: str | None, time_str: str | None) -> datetime | No
         return None
 
 
-def is_trading_window(now: datetime) -> bool:
-    if now.weekday() >= 5:
-        return False
-    market_open = time(9, 0)
-    market_close = time(13, 30)
-    return market_open <= now.time() <= market_close
+def create_mis_session(pool_size: int = DEFAULT_FETCH_WORKERS) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    return session
 
 
-def fetch_mis_quotes(channels: List[str], retries: int = 3, backoff_seconds: float = 1.5) -> Dict[str, dict]:
+def fetch_mis_quotes(
+    channels: List[str],
+    retries: int = 3,
+    backoff_seconds: float = 1.5,
+    session: requests.Session | None = None,
+) -> Dict[str, dict]:
     params = {"ex_ch": "|".join(channels), "json": 1}
+    http = session or requests
     last_error = None
 
     for attempt in range(1, retries + 1):
         try:
-            response = requests.get(MIS_URL, params=params, headers=MIS_HEADERS, timeout=10, verify=False)
+            response = http.get(MIS_URL, params=params, headers=MIS_HEADERS, timeout=10, verify=False)
             response.raise_for_status()
             payload = response.json()
             quotes = {}
@@ -97,6 +184,32 @@ def fetch_mis_quotes(channels: List[str], retries: int = 3, backoff_seconds: flo
     raise RuntimeError(f"Unable to fetch TWSE MIS quotes after {retries} attempts") from last_error
 
 
+def fetch_mis_quotes_chunked(
+    channels: List[str],
+    session: requests.Session | None = None,
+    max_workers: int = DEFAULT_FETCH_WORKERS,
+) -> Dict[str, dict]:
+    chunks = chunk_channels(channels)
+    if len(chunks) <= 1:
+        return fetch_mis_quotes(channels, session=session)
+
+    # Each chunk retries on its own, so one slow chunk only delays its own slot in the pool.
+    quotes: Dict[str, dict] = {}
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        futures = [pool.submit(fetch_mis_quotes, chunk, session=session) for chunk in chunks]
+        for index, future in enumerate(futures):
+            try:
+                quotes.update(future.result())
+            except RuntimeError as exc:
+                failures.append(index)
+                print(f"TWSE MIS chunk {index + 1}/{len(chunks)} failed: {exc.__cause__ or exc}")
+
+    if len(failures) == len(chunks):
+        raise RuntimeError(f"All {len(chunks)} TWSE MIS chunks failed")
+    return quotes
+
+
 def build_quote(entry: dict | None) -> dict:
     if not entry:
         return {"price": None, "change": None, "changePercent": None, "currency": "TWD", "trend": []}
@@ -131,21 +244,95 @@ def build_quote(entry: dict | None) -> dict:
     }
 
 
-def build_report(now: datetime):
-    channels = [asset["channel"] for asset in ASSETS]
-    raw_quotes = fetch_mis_quotes(channels)
+def build_intraday(store: TickStore, entry: dict | None, channel_key: str) -> dict | None:
+    if not entry or not entry.get("d"):
+        return None
+    day = entry["d"]
+    ticks = store.series(day, channel_key, TREND_POINTS)
+    if not ticks:
+        return None
+
+    trend = []
+    prev_close = parse_decimal(entry.get("y"))
+    if prev_close is not None:
+        trend.append({"time": "前收", "close": fmt(prev_close)})
+    for tick in ticks:
+        trend.append({"time": tick.time.strftime("%H:%M"), "close": fmt(parse_decimal(tick.last))})
+
+    latest = store.last(day, channel_key)
+    return {
+        "trend": trend,
+        "dayHigh": fmt(parse_decimal(latest.high)),
+        "dayLow": fmt(parse_decimal(latest.low)),
+        "ticks": store.count(day, channel_key),
+    }
+
+
+def build_bars(bars: BarBuilder, channel_key: str) -> dict | None:
+    current = bars.current(channel_key)
+    if not current:
+        return None
+    return {
+        INTERVAL_LABELS.get(interval, f"{interval}s"): {
+            "start": bar.time.isoformat(),
+            "time": bar.time.strftime("%H:%M"),
+            "open": fmt(parse_decimal(bar.open)),
+            "high": fmt(parse_decimal(bar.high)),
+            "low": fmt(parse_decimal(bar.low)),
+            "close": fmt(parse_decimal(bar.close)),
+            "volume": bar.volume,
+        }
+        for interval, bar in current.items()
+    }
+
+
+def build_report(
+    now: datetime,
+    session: requests.Session | None = None,
+    store: TickStore | None = None,
+    assets: List[dict] | None = None,
+    max_workers: int = DEFAULT_FETCH_WORKERS,
+    bars: BarBuilder | None = None,
+):
+    assets = assets or ASSETS
+    channels = [asset["channel"] for asset in assets]
+    raw_quotes = fetch_mis_quotes_chunked(channels, session=session, max_workers=max_workers)
+
+    channel_keys = [asset["channel"].split("_", 1)[-1] for asset in assets]
+    entries = [raw_quotes.get(key) for key in channel_keys]
+    batch = QuoteBatch.from_entries(entries)
+    quotes = batch.to_dicts()
+
+    if store is not None:
+        # A store failure (full disk, unreadable file) costs that symbol its history, not the snapshot.
+        for channel_key, entry in raw_quotes.items():
+            try:
+                tick = store.append(channel_key, entry)
+                if tick is not None and bars is not None:
+                    bars.ingest(store, channel_key, entry["d"], tick)
+            except OSError as exc:
+                print(f"Warning: tick store write failed for {channel_key}: {exc}")
+        for i, (channel_key, entry) in enumerate(zip(channel_keys, entries)):
+            levels = batch.depth_row(i) if entry else None
+            if levels is not None:
+                try:
+                    store.append_depth(channel_key, entry, levels)
+                except OSError as exc:
+                    print(f"Warning: depth write failed for {channel_key}: {exc}")
 
     items = []
     data_date = None
-    for asset in ASSETS:
-        channel_key = asset["channel"].split("_", 1)[-1]
-        entry = raw_quotes.get(channel_key)
-        quote = build_quote(entry)
+    for asset, channel_key, entry, quote in zip(assets, channel_keys, entries, quotes):
+        try:
+            intraday = build_intraday(store, entry, channel_key) if store is not None else None
+        except OSError as exc:
+            print(f"Warning: tick store read failed for {channel_key}: {exc}")
+            intraday = None
 
         if not data_date and entry:
             data_date = entry.get("d")
 
-        items.append({
+        item = {
             "label": asset["label"],
             "symbol": asset["symbol"],
             "type": asset["type"],
@@ -153,9 +340,19 @@ def build_report(now: datetime):
             "change": quote["change"],
             "changePercent": quote["changePercent"],
             "currency": quote["currency"],
-            "trend": quote["trend"],
+            "trend": intraday["trend"] if intraday else quote["trend"],
             "timestamp": quote["timestamp"],
-        })
+        }
+        if "depth" in quote:
+            item["depth"] = quote["depth"]
+        current_bars = build_bars(bars, channel_key) if bars is not None else None
+        if current_bars:
+            item["bars"] = current_bars
+        if intraday:
+            item["dayHigh"] = intraday["dayHigh"]
+            item["dayLow"] = intraday["dayLow"]
+            item["ticks"] = intraday["ticks"]
+        items.append(item)
 
     data_date_iso = None
     if data_date:
@@ -176,31 +373,141 @@ def build_report(now: datetime):
         },
         "market": {
             "name": "TWSE",
-            "open": "09:00",
-            "close": "13:30",
+            "open": SESSION_OPEN.strftime("%H:%M"),
+            "close": SESSION_CLOSE.strftime("%H:%M"),
+            "isTradingDay": is_trading_day(now.date()),
             "isTradingWindow": is_trading_window(now),
         },
         "items": items,
     }
 
 
+def write_report(report: dict, out_file: Path) -> None:
+    # Write to a sibling temp file first so readers never see a half-written JSON.
+    tmp_file = out_file.with_name(out_file.name + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, out_file)
+
+
+def in_close_grace(now: datetime) -> bool:
+    """True just after a session's close, while the closing-auction quotes come in."""
+    now = now.astimezone(TZ)
+    close = datetime.combine(now.date(), SESSION_CLOSE, tzinfo=TZ)
+    return is_trading_day(now.date()) and close < now <= close + CLOSE_GRACE
+
+
+def run_poller(out_file: Path, interval: float, store: TickStore, assets: List[dict], max_workers: int) -> None:
+    session = create_mis_session(max_workers)
+    bars = BarBuilder()
+    print(f"TW poller started for {len(assets)} symbols (every {interval:.1f}s during market hours)")
+
+    while True:
+        now = datetime.now(tz=TZ)
+        if not (is_trading_window(now) or in_close_grace(now)):
+            try:
+                flushed = bars.flush(store)
+            except OSError as exc:
+                print(f"Warning: final bars not stored: {exc}")
+            else:
+                if flushed:
+                    print(f"Session closed; stored {flushed} final bars")
+            # Holidays are in the calendar, so this sleeps straight through to the next real session.
+            wake_at = next_session_start(now)
+            print(f"Outside trading window; sleeping until {wake_at.isoformat()}")
+            time_module.sleep(max(1.0, (wake_at - now).total_seconds()))
+            continue
+
+        started = time_module.monotonic()
+        try:
+            report = build_report(
+                now, session=session, store=store, assets=assets, max_workers=max_workers, bars=bars
+            )
+        except Exception as exc:
+            print(f"Warning: failed to refresh TW report ({exc}); keeping existing {out_file}")
+        else:
+            write_report(report, out_file)
+            print(f"Updated {out_file} at {now.isoformat()}")
+
+        elapsed = time_module.monotonic() - started
+        time_module.sleep(max(0.0, interval - elapsed))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Refresh data/latest.json from TWSE MIS")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and poll MIS during market hours")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_POLL_SECONDS,
+        help=f"Seconds between polls in daemon mode (default: {DEFAULT_POLL_SECONDS:g})",
+    )
+    parser.add_argument(
+        "--watchlist",
+        type=Path,
+        default=WATCHLIST_FILE,
+        help="JSON list of symbols to track (default: data/tw_watchlist.json, falling back to the built-in list)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_FETCH_WORKERS,
+        help=f"Concurrent MIS requests when the watchlist spans several chunks (default: {DEFAULT_FETCH_WORKERS})",
+    )
+    parser.add_argument("--force", action="store_true", help="Refresh even on a non-trading day")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     now = datetime.now(tz=TZ)
     base_dir = Path(__file__).resolve().parent.parent
     data_dir = base_dir / "data"
     data_dir.mkdir(parents=True, exist_ok=True)
     out_file = data_dir / "latest.json"
+    store = TickStore(data_dir / "ticks")
+    assets = load_watchlist(args.watchlist)
+    workers = max(1, args.workers)
 
+    if args.daemon:
+        try:
+            run_poller(out_file, max(1.0, args.interval), store, assets, workers)
+        finally:
+            store.close()
+        return
+
+    if not args.force and not is_trading_day(now.date()) and out_file.exists():
+        print(f"Non-trading day ({now.date().isoformat()}); keeping existing {out_file}")
+        return
+
+    bars = BarBuilder()
     try:
-        report = build_report(now)
+        report = build_report(
+            now,
+            session=create_mis_session(workers),
+            store=store,
+            assets=assets,
+            max_workers=workers,
+            bars=bars,
+        )
+        if now.time() > SESSION_CLOSE and not in_close_grace(now):
+            # No later poll today will complete the last bars, so store them as they are.
+            try:
+                flushed = bars.flush(store)
+            except OSError as exc:
+                print(f"Warning: final bars not stored: {exc}")
+            else:
+                if flushed:
+                    print(f"Session closed; stored {flushed} final bars")
     except Exception as exc:
         if out_file.exists():
             print(f"Warning: failed to refresh TW report ({exc}); keeping existing {out_file}")
             return
         raise
+    finally:
+        store.close()
 
-    with open(out_file, "w", encoding="utf-8") as f:
-        json.dump(report, f, ensure_ascii=False, indent=2)
+    write_report(report, out_file)
 
     print(f"Updated {out_file} at {now.isoformat()}")
 
@@ -4,45 +4,27 @@ from datetime import datetime
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
-import requests
-from bs4 import BeautifulSoup
+from article_summary import article_summaries, enabled as summaries_enabled
+from headline_parser import extract_headlines
+from http_cache import HttpCache, previous_ok
+from news_archive import archive_items
+from seen_set import mark_new, remark_output
 
 TZ = ZoneInfo("Asia/Taipei")
 URL = "https://news.cnyes.com/news/cat/tw_stock_news"
+KEYWORDS = ("news", "topic", "twstock")
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+}
 
 
-def fetch_headlines():
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
-    }
-    resp = requests.get(URL, headers=headers, timeout=20)
-    resp.raise_for_status()
-
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    headlines = []
-    for a in soup.select("a"):
-        text = " ".join(a.get_text(strip=True).split())
-        href = a.get("href") or ""
-        if not text or len(text) < 8:
-            continue
-        if not href:
-            continue
-        if href.startswith("/"):
-            href = "https://www.cnyes.com" + href
-        if "news" in href or "topic" in href or "twstock" in href:
-            headlines.append({"title": text, "url": href})
+def fetch_page(cache: HttpCache):
+    return cache.fetch(URL, headers=HEADERS, timeout=20)
 
-    seen = set()
-    uniq = []
-    for h in headlines:
-        key = (h["title"], h["url"])
-        if key in seen:
-            continue
-        seen.add(key)
-        uniq.append(h)
 
-    return uniq[:12]
+def fetch_headlines(html: str):
+    # Streams the page's anchors only and stops after the first 12 unique headlines.
+    return extract_headlines(html, KEYWORDS, limit=12)
 
 
 def summarize(headlines):
@@ -51,18 +33,35 @@ def summarize(headlines):
 
     top = headlines[:5]
     joined = "；".join([f"{i+1}. {x['title']}" for i, x in enumerate(top)])
-    return f"今日台股新聞重點：{joined}。建議優先關注權值股、ETF 資金流向與政策面消息。"
+    lead = f"頭條摘要：{top[0]['summary']}" if top[0].get("summary") else ""
+    return f"今日台股新聞重點：{joined}。建議優先關注權值股、ETF 資金流向與政策面消息。{lead}"
 
 
 def main():
     now = datetime.now(tz=TZ).isoformat()
+    base = Path(__file__).resolve().parent.parent
+    data_dir = base / "data"
+    out_file = data_dir / "tw_news.json"
     try:
-        headlines = fetch_headlines()
+        resp = fetch_page(HttpCache())
+        if not resp.changed and previous_ok(out_file):
+            remark_output(out_file, "tw_news", ("headlines",))
+            print(f"{URL} unchanged; kept {out_file}")
+            return
+        headlines = fetch_headlines(resp.text())
+        if summaries_enabled():
+            found = article_summaries([h["url"] for h in headlines])
+            for h in headlines:
+                if h["url"] in found:
+                    h["summary"] = found[h["url"]]
+        archive_items(headlines, "tw_news")
+        new_count = mark_new(headlines, "tw_news")
         summary = summarize(headlines)
         ok = True
         error = None
     except Exception as e:
         headlines = []
+        new_count = 0
         summary = "目前新聞來源連線異常，請稍後再試。"
         ok = False
         error = str(e)
@@ -74,13 +73,11 @@ def main():
         "ok": ok,
         "summary": summary,
         "headlines": headlines,
+        "newCount": new_count,
         "error": error,
     }
 
-    base = Path(__file__).resolve().parent.parent
-    data_dir = base / "data"
     data_dir.mkdir(parents=True, exist_ok=True)
-    out_file = data_dir / "tw_news.json"
     out_file.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"Updated {out_file}")
 
@@ -1,12 +1,24 @@
 #!/usr/bin/env python3
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
+import pandas as pd
 import yfinance as yf
 
+from bar_cache import BarCache, window_start
+from indicators import IndicatorStore
+
 TZ = ZoneInfo("Asia/Taipei")
+DOWNLOAD_TIMEOUT = 15
+MAX_FALLBACK_WORKERS = 4
+CACHE_FILE = Path(__file__).resolve().parent.parent / "data" / "cache" / "bars.sqlite"
+INDICATOR_FILE = CACHE_FILE.with_name("indicators.json")
+# A year of daily bars covers the 200-day indicators; quotes only need the last two.
+DAILY_CACHE_PERIOD = "1y"
 
 ASSETS = [
     {"label": "台積電ADR", "symbol": "TSM", "type": "Stock"},
@@ -27,16 +39,88 @@ def fmt(v, d=2):
     return round(float(v), d)
 
 
-def fetch_quote(symbol: str):
-    t = yf.Ticker(symbol)
-    intraday = t.history(period="1d", interval="15m", auto_adjust=False)
+def download_bars(symbols, period: str, interval: str, timeout: float = DOWNLOAD_TIMEOUT, start=None):
+    """One bulk request for every symbol; returns {symbol: DataFrame}, empty for failures.
+
+    With `start`, bars are requested from that time instead of for the whole `period`.
+    """
+    frames = {symbol: pd.DataFrame() for symbol in symbols}
+    window = {"start": start} if start is not None else {"period": period}
+    if not symbols:
+        return frames
+    try:
+        data = yf.download(
+            symbols,
+            **window,
+            interval=interval,
+            group_by="ticker",
+            auto_adjust=False,
+            threads=True,
+            progress=False,
+            timeout=timeout,
+        )
+    except Exception as exc:
+        print(f"Bulk {interval} download failed: {exc}")
+        data = None
+
+    if data is not None and not data.empty and isinstance(data.columns, pd.MultiIndex):
+        tickers = set(data.columns.get_level_values(0))
+        for symbol in symbols:
+            if symbol in tickers:
+                frames[symbol] = data[symbol].dropna(how="all")
+
+    # Retry only the symbols the bulk call dropped, each with its own timeout.
+    missing = [symbol for symbol in symbols if frames[symbol].empty]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(MAX_FALLBACK_WORKERS, len(missing))) as pool:
+            futures = {
+                symbol: pool.submit(
+                    yf.Ticker(symbol).history, **window, interval=interval, auto_adjust=False, timeout=timeout
+                )
+                for symbol in missing
+            }
+            for symbol, future in futures.items():
+                try:
+                    frames[symbol] = future.result(timeout=timeout * 2)
+                except Exception as exc:
+                    print(f"{symbol} {interval} download failed: {exc}")
+    return frames
+
+
+def cached_daily_bars(cache: BarCache, symbols):
+    """DAILY_CACHE_PERIOD of daily bars per symbol, downloading only bars newer than the cache."""
+    now = pd.Timestamp.now(tz="UTC")
+    starts = {symbol: cache.fetch_start(symbol, "1d", DAILY_CACHE_PERIOD, now) for symbol in symbols}
+    full = [symbol for symbol, start in starts.items() if start is None]
+    delta = [symbol for symbol, start in starts.items() if start is not None]
+
+    fetched = {}
+    if full:
+        fetched.update(download_bars(full, period=DAILY_CACHE_PERIOD, interval="1d"))
+    if delta:
+        # One bulk call from the oldest resume point; newer symbols just re-store a few bars.
+        fetched.update(download_bars(delta, period=DAILY_CACHE_PERIOD, interval="1d", start=min(starts[s] for s in delta)))
+
+    keep_since = window_start(DAILY_CACHE_PERIOD, now)
+    for symbol, frame in fetched.items():
+        cache.store(symbol, "1d", frame, keep_since=keep_since)
+    print(f"Daily cache: {len(full)} full, {len(delta)} delta downloads")
+    return {symbol: cache.load(symbol, "1d", since=keep_since) for symbol in symbols}
+
+
+def close_series(frame: pd.DataFrame) -> pd.Series:
+    if frame is None or frame.empty or "Close" not in frame:
+        return pd.Series(dtype=float)
+    return frame["Close"].dropna()
+
+
+def build_quote(intraday: pd.DataFrame, daily: pd.DataFrame):
     latest = None
     if not intraday.empty and "Close" in intraday:
         c = intraday["Close"].dropna()
         if not c.empty:
             latest = c.iloc[-1]
 
-    daily = t.history(period="5d", interval="1d", auto_adjust=False)
     prev = None
     if not daily.empty and "Close" in daily:
         dc = daily["Close"].dropna()
@@ -66,9 +150,53 @@ def fetch_quote(symbol: str):
 
 def main():
     now = datetime.now(tz=TZ)
+    symbols = [a["symbol"] for a in ASSETS]
+    timings = {}
+
+    started = time.perf_counter()
+    intraday = download_bars(symbols, period="1d", interval="15m")
+    timings["intraday"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    cache = BarCache(CACHE_FILE)
+    try:
+        daily = cached_daily_bars(cache, symbols)
+    finally:
+        cache.close()
+    timings["daily"] = time.perf_counter() - started
+
+    started = time.perf_counter()
     items = []
     for a in ASSETS:
-        items.append({"label": a["label"], "symbol": a["symbol"], "type": a["type"], **fetch_quote(a["symbol"])})
+        try:
+            quote = build_quote(intraday[a["symbol"]], daily[a["symbol"]])
+        except Exception as exc:
+            print(f"{a['symbol']}: failed to build quote: {exc}")
+            quote = {"price": None, "change": None, "changePercent": None, "trend": []}
+        items.append({"label": a["label"], "symbol": a["symbol"], "type": a["type"], **quote})
+    timings["build"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    indicator_store = IndicatorStore(INDICATOR_FILE)
+    for item in items:
+        indicators = indicator_store.indicators(f"{item['symbol']}:1d", close_series(daily[item["symbol"]]))
+        if indicators:
+            item["indicators"] = indicators
+    indicator_store.save()
+    timings["indicators"] = time.perf_counter() - started
+
+    failed = [item["symbol"] for item in items if item["price"] is None]
+    if failed:
+        print(f"Missing quotes for: {', '.join(failed)}")
+    print("Timings: " + ", ".join(f"{stage}={secs:.2f}s" for stage, secs in timings.items()))
+
+    base = Path(__file__).resolve().parent.parent
+    data_dir = base / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    f = data_dir / "us_latest.json"
+    if len(failed) == len(items) and f.exists():
+        print(f"Warning: no US quotes fetched; keeping existing {f}")
+        return
 
     out = {
         "updatedAt": now.isoformat(),
@@ -77,10 +205,6 @@ def main():
         "items": items,
     }
 
-    base = Path(__file__).resolve().parent.parent
-    data_dir = base / "data"
-    data_dir.mkdir(parents=True, exist_ok=True)
-    f = data_dir / "us_latest.json"
     f.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"Updated {f}")
 
@@ -0,0 +1,203 @@
+"""Resolve Google News redirect links to the publisher's article URL.
+
+Google News RSS items link to news.google.com/rss/articles/<id>. Every click
+costs an extra hop, and two outlets' copies of a story can only be told apart
+by the opaque id. `resolve_urls` maps each link to the publisher's canonical
+URL (news_urls.canonical_url, so tracking parameters are already stripped):
+
+1. From the persistent cache, data/cache/resolved_urls.json.
+2. By decoding the id itself: older ids are base64 protobuf that embed the
+   URL, so no request is needed.
+3. By fetching the link concurrently under one deadline. The final URL is
+   taken from the redirect chain or from the article page's data-n-au
+   attribute. At most `max_fetches` links are fetched per run.
+
+The jobs only resolve the stories they can show: `shortlist` keeps the first
+few items with distinct publisher URLs once a padded top list is resolved.
+
+Cache entries expire `ttl` seconds after last use, and beyond `max_entries`
+the least recently used are dropped. Links that could not be resolved are
+returned unchanged and retried on the next run.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import html
+import json
+import os
+import re
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+from fetch_pool import fetch_in_order
+from news_urls import canonical_url
+
+CACHE_FILE = Path(__file__).resolve().parent.parent / "data" / "cache" / "resolved_urls.json"
+DEFAULT_TTL = 30 * 86400
+DEFAULT_MAX_ENTRIES = 20000
+REQUEST_TIMEOUT = 10
+MAX_WORKERS = 8
+RESOLVE_DEADLINE = 30
+# Safety cap on article fetches per run; links beyond it stay unresolved until the next run.
+MAX_FETCHES_PER_RUN = 40
+# Extra stories resolved per list, in case some turn out to share an article.
+SHORTLIST_SLACK = 3
+MAX_PAGE_BYTES = 512 * 1024
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+ARTICLE_ID_RE = re.compile(r"/articles/([A-Za-z0-9_-]+)")
+EMBEDDED_URL_RE = re.compile(rb"https?://[\x21-\x7e]+")
+PUBLISHER_ATTR_RE = re.compile(r'data-n-au="([^"]+)"')
+
+
+def is_google_news(url: str) -> bool:
+    return (urlsplit(url).hostname or "").lower() == "news.google.com"
+
+
+def decode_article_id(url: str) -> str | None:
+    """The publisher URL embedded in an old-style article id, if there is one."""
+    match = ARTICLE_ID_RE.search(urlsplit(url).path)
+    if not match:
+        return None
+    token = match.group(1)
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        return None
+    found = EMBEDDED_URL_RE.search(raw)
+    return found.group().decode("ascii") if found else None
+
+
+def fetch_publisher_url(url: str, timeout: float = REQUEST_TIMEOUT) -> str:
+    with urlopen(Request(url, headers={"User-Agent": USER_AGENT}), timeout=timeout) as resp:
+        final = resp.geturl()
+        if not is_google_news(final):
+            return final
+        page = resp.read(MAX_PAGE_BYTES).decode("utf-8", errors="ignore")
+    match = PUBLISHER_ATTR_RE.search(page)
+    if not match:
+        raise ValueError("no publisher link on the article page")
+    return html.unescape(match.group(1))
+
+
+class ResolverCache:
+    def __init__(self, path: Path = CACHE_FILE, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # redirect url -> [resolved url, last used]
+        self.entries: dict[str, list] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as exc:
+                print(f"Warning: ignoring unreadable {self.path}: {exc}")
+
+    def get(self, url: str, now: float) -> str | None:
+        entry = self.entries.get(url)
+        if entry is None or now - entry[1] > self.ttl:
+            return None
+        entry[1] = now
+        return entry[0]
+
+    def put(self, url: str, resolved: str, now: float) -> None:
+        self.entries[url] = [resolved, now]
+
+    def save(self, now: float) -> None:
+        live = sorted(
+            ((k, v) for k, v in self.entries.items() if now - v[1] <= self.ttl),
+            key=lambda pair: pair[1][1],
+            reverse=True,
+        )[: self.max_entries]
+        self.entries = dict(live)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def resolve_urls(
+    urls: list[str],
+    cache_path: Path = CACHE_FILE,
+    fetch: Callable[..., str] = fetch_publisher_url,
+    deadline: float = RESOLVE_DEADLINE,
+    max_fetches: int = MAX_FETCHES_PER_RUN,
+) -> dict[str, str]:
+    """{url: publisher url} for every input; unresolved links map to themselves."""
+    now = time.time()
+    cache = ResolverCache(cache_path)
+    out: dict[str, str] = {}
+    pending = []
+    hits = decoded = 0
+    for url in dict.fromkeys(u for u in urls if u):
+        if not is_google_news(url):
+            out[url] = url
+            continue
+        resolved = cache.get(url, now)
+        if resolved is not None:
+            out[url] = resolved
+            hits += 1
+            continue
+        embedded = decode_article_id(url)
+        if embedded:
+            resolved = canonical_url(embedded)
+            cache.put(url, resolved, now)
+            out[url] = resolved
+            decoded += 1
+        else:
+            pending.append(url)
+
+    deferred = pending[max_fetches:]
+    pending = pending[:max_fetches]
+    for url in deferred:
+        out[url] = url
+
+    results = fetch_in_order(
+        [partial(fetch, url) for url in pending],
+        request_timeout=REQUEST_TIMEOUT,
+        max_workers=MAX_WORKERS,
+        deadline=deadline,
+    )
+    failed = 0
+    for url, (final, error) in zip(pending, results):
+        if error is not None or not final:
+            out[url] = url
+            failed += 1
+            continue
+        resolved = canonical_url(final)
+        cache.put(url, resolved, now)
+        out[url] = resolved
+
+    try:
+        cache.save(now)
+    except OSError as exc:
+        print(f"Warning: resolver cache not saved: {exc}")
+    print(
+        f"Resolved links: {hits} cached, {decoded} decoded, "
+        f"{len(pending) - failed} fetched, {failed + len(deferred)} left as Google News links"
+        + (f" ({len(deferred)} over the per-run cap)" if deferred else "")
+    )
+    return out
+
+
+def shortlist(items: list[dict], limit: int) -> list[dict]:
+    """The first `limit` items with distinct canonical URLs.
+
+    Resolving can turn two different redirect links into the same article,
+    so the jobs resolve a few more items than they show and trim here.
+    """
+    out, seen = [], set()
+    for item in items:
+        key = canonical_url(item.get("url") or "")
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(item)
+        if len(out) >= limit:
+            break
+    return out
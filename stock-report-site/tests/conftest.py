@@ -0,0 +1,74 @@
+"""Shared test setup: scripts on sys.path and a local stand-in for the LINE API.
+
+notify_line reads its endpoints and cache paths from the environment at
+import, so they are pointed at the stand-in here, before any test imports it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+class StandInLine(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Shared with the tests: issued tokens, revoked tokens and the token lifetime handed out.
+    issued: list[str] = []
+    revoked: set[str] = set()
+    expires_in = 30 * 86400
+
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._reply(200, {"ids": []})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.endswith("/accessToken"):
+            token = f"token-{len(self.issued) + 1}"
+            self.issued.append(token)
+            self._reply(200, {"access_token": token, "expires_in": self.expires_in})
+        elif self.headers.get("Authorization", "").removeprefix("Bearer ") in self.revoked:
+            self._reply(401, {"message": "Authentication failed"})
+        else:
+            self._reply(200, {})
+
+    def log_message(self, *args):
+        pass
+
+
+SERVER = ThreadingHTTPServer(("127.0.0.1", 0), StandInLine)
+threading.Thread(target=SERVER.serve_forever, daemon=True).start()
+BASE = f"http://127.0.0.1:{SERVER.server_address[1]}"
+CACHE_DIR = Path(tempfile.mkdtemp())
+
+os.environ.update(
+    LINE_API_BASE=BASE,
+    LINE_SUBSCRIBERS_URL=f"{BASE}/subscribers",
+    LINE_TOKEN_CACHE=str(CACHE_DIR / "line_token.json"),
+    LINE_SUBSCRIBER_CACHE=str(CACHE_DIR / "line_subscribers.json"),
+)
+
+
+@pytest.fixture
+def line_api():
+    StandInLine.issued.clear()
+    StandInLine.revoked.clear()
+    StandInLine.expires_in = 30 * 86400
+    yield StandInLine
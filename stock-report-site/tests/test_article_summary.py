@@ -0,0 +1,62 @@
+"""Main-text extraction and summaries from article_summary, on saved article pages."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from article_summary import extract_main_text, summarize_html, summarize_text
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def page(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def test_extract_prefers_article_paragraphs():
+    body = extract_main_text(page("article_zh.html"))
+    lines = body.split("\n")
+    assert lines[0].startswith("台積電今日法說會上調全年營收預測")
+    assert len(lines) == 5
+    # Header, nav, caption, aside, footer, script and the short byline are all left out.
+    for noise in ("範例財經｜首頁", "延伸閱讀", "版權所有", "dataLayer", "記者王小明"):
+        assert noise not in body
+
+
+def test_extract_falls_back_to_div_blocks():
+    body = extract_main_text(page("article_en_divs.html"))
+    assert body.startswith("The Federal Reserve left its benchmark rate unchanged")
+    assert "utility shares" in body
+    assert "Example Wire" not in body
+
+
+def test_extract_rejects_page_without_article():
+    assert extract_main_text(page("nav_only.html")) == ""
+    assert summarize_html(page("nav_only.html")) == ""
+
+
+def test_summarize_html_zh_drops_repeated_lead():
+    summary = summarize_html(page("article_zh.html"))
+    assert summary.startswith("台積電今日法說會上調全年營收預測")
+    assert summary.count("上調全年營收預測") == 1
+    assert len(summary) <= 300
+
+
+def test_summarize_html_en_keeps_original_order():
+    summary = summarize_html(page("article_en_divs.html"))
+    assert summary.startswith("The Federal Reserve")
+    body = extract_main_text(page("article_en_divs.html"))
+    positions = [body.index(s.strip()) for s in summary.split(". ") if s.strip()]
+    assert positions == sorted(positions)
+
+
+def test_summarize_text_skips_near_identical_sentences():
+    text = (
+        "Chip maker TSMC raised its revenue forecast on strong AI demand. "
+        "The company also said capital spending would rise next year. "
+        "Analysts expect margins to hold above fifty percent. "
+        "TSMC raised its revenue forecast on strong AI demand."
+    )
+    summary = summarize_text(text)
+    assert summary.count("revenue forecast") == 1
+    assert "capital spending" in summary and "margins" in summary
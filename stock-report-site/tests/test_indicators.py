@@ -0,0 +1,58 @@
+"""Incremental indicator state must match a full recompute over the same window."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import IndicatorStore, fold, seed, snapshot
+
+
+def closes(n: int) -> pd.Series:
+    rng = np.random.default_rng(7)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    # An early high that later drops out of the window.
+    values[5] = values.max() * 1.5
+    return pd.Series(values, index=pd.date_range("2025-01-01", periods=n, freq="D", tz="UTC"))
+
+
+def recompute(window: pd.Series) -> dict:
+    ts = window.index.as_unit("s").asi8
+    values = window.to_numpy(dtype=float)
+    return snapshot(fold(seed(ts[:-1], values[:-1]), ts[-1:], values[-1:]))
+
+
+def assert_same(got: dict, want: dict) -> None:
+    for key, value in want.items():
+        if isinstance(value, dict):
+            assert got[key] == pytest.approx(value), key
+        else:
+            assert got[key] == pytest.approx(value, abs=1e-6), key
+
+
+def test_growing_window_matches_recompute(tmp_path):
+    series = closes(320)
+    store = IndicatorStore(tmp_path / "indicators.json")
+    for end in range(250, 320, 7):
+        assert_same(store.indicators("X:1d", series.iloc[:end]), recompute(series.iloc[:end]))
+
+
+def test_sliding_window_matches_recompute(tmp_path):
+    series = closes(320)
+    path = tmp_path / "indicators.json"
+    for end in range(250, 320, 5):
+        # A fresh store per run, as each hourly job loads the saved states.
+        store = IndicatorStore(path)
+        window = series.iloc[end - 250:end]
+        assert_same(store.indicators("X:1d", window), recompute(window))
+        store.save()
+
+
+def test_peak_forgets_bars_that_left_the_window(tmp_path):
+    series = closes(320)
+    store = IndicatorStore(tmp_path / "indicators.json")
+    store.indicators("X:1d", series.iloc[:250])
+    later = store.indicators("X:1d", series.iloc[10:260])
+    assert later["drawdown"] == pytest.approx(recompute(series.iloc[10:260])["drawdown"])
+    assert store.states["X:1d"].count == 249
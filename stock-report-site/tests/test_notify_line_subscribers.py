@@ -0,0 +1,78 @@
+"""Subscriber-list revalidation in notify_line, against a stand-in for the webhook worker."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import notify_line
+
+
+class StandInWorker(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # The worker's stored list, the delta it will serve for any `since`, and the requests seen.
+    ids: list[str] = []
+    version = 1
+    delta: dict = {}
+    requests: list[str] = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        query = parse_qs(urlsplit(self.path).query)
+        if "since" in query:
+            body = {"version": self.version, **self.delta, "digest": notify_line.subscriber_digest(self.ids)}
+        else:
+            body = {"version": self.version, "ids": self.ids}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", f'"v{self.version}"')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def worker(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInWorker)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(notify_line, "LINE_SUBSCRIBERS_URL", f"http://127.0.0.1:{server.server_address[1]}/subscribers")
+    StandInWorker.requests = []
+    yield StandInWorker
+    server.shutdown()
+
+
+def cached_record(ids, synced_at):
+    return {"ids": ids, "version": 1, "etag": '"v1"', "fetchedAt": 0, "syncedAt": synced_at}
+
+
+def test_delta_applies_when_digest_matches(worker):
+    worker.ids, worker.version, worker.delta = ["U1", "U3"], 3, {"added": ["U3"], "removed": ["U2"]}
+    record = notify_line.fetch_subscribers(cached_record(["U1", "U2"], time.time()))
+    assert record["ids"] == ["U1", "U3"]
+    assert worker.requests == ["/subscribers?since=1"]
+
+
+def test_digest_mismatch_refetches_full_list(worker):
+    # The worker lost the log entry for U4's follow: the delta alone would miss it.
+    worker.ids, worker.version, worker.delta = ["U1", "U3", "U4"], 3, {"added": ["U3"], "removed": ["U2"]}
+    record = notify_line.fetch_subscribers(cached_record(["U1", "U2"], time.time()))
+    assert record["ids"] == ["U1", "U3", "U4"]
+    assert worker.requests == ["/subscribers?since=1", "/subscribers"]
+    assert record["syncedAt"] >= record["fetchedAt"] - 1
+
+
+def test_stale_sync_forces_full_fetch(worker):
+    worker.ids, worker.version, worker.delta = ["U9"], 3, {"added": [], "removed": []}
+    old = time.time() - notify_line.SUBSCRIBER_RESYNC - 1
+    record = notify_line.fetch_subscribers(cached_record(["U1"], old))
+    assert record["ids"] == ["U9"]
+    assert worker.requests == ["/subscribers"]
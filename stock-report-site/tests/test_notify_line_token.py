@@ -0,0 +1,69 @@
+"""Channel token caching in notify_line, against the stand-in LINE API from conftest."""
+
+from __future__ import annotations
+
+import json
+import stat
+import time
+
+import pytest
+
+import notify_line
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(line_api):
+    notify_line.TOKEN_CACHE.unlink(missing_ok=True)
+    yield
+
+
+def test_cache_hit_makes_no_request(line_api, tmp_path):
+    path = tmp_path / "token.json"
+    notify_line.store_token("chan", "cached", time.time() + 7 * 86400, path)
+    assert notify_line.cached_access_token("chan", "secret", path=path) == "cached"
+    assert line_api.issued == []
+
+
+def test_miss_fetches_and_caches(line_api, tmp_path):
+    path = tmp_path / "token.json"
+    assert notify_line.cached_access_token("chan", "secret", path=path) == "token-1"
+    assert notify_line.cached_access_token("chan", "secret", path=path) == "token-1"
+    assert line_api.issued == ["token-1"]
+
+
+def test_refreshes_within_margin(tmp_path):
+    path = tmp_path / "token.json"
+    notify_line.store_token("chan", "stale", time.time() + notify_line.TOKEN_REFRESH_MARGIN - 60, path)
+    assert notify_line.cached_access_token("chan", "secret", path=path) == "token-1"
+    assert json.loads(path.read_text())["accessToken"] == "token-1"
+
+
+def test_channel_mismatch_invalidates_cache(tmp_path):
+    path = tmp_path / "token.json"
+    notify_line.store_token("other", "foreign", time.time() + 7 * 86400, path)
+    assert notify_line.load_cached_token("chan", path) is None
+    assert notify_line.cached_access_token("chan", "secret", path=path) == "token-1"
+    assert json.loads(path.read_text())["channelId"] == "chan"
+
+
+@pytest.mark.parametrize("content", ["[]", '"token"', "null", "42", "{not json", '{"expiresAt": "soon"}'])
+def test_malformed_cache_is_a_miss(tmp_path, content):
+    path = tmp_path / "token.json"
+    path.write_text(content)
+    assert notify_line.load_cached_token("chan", path) is None
+    assert notify_line.cached_access_token("chan", "secret", path=path) == "token-1"
+
+
+def test_cache_file_is_private(tmp_path):
+    path = tmp_path / "cache" / "token.json"
+    notify_line.cached_access_token("chan", "secret", path=path)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_refreshes_after_401(line_api):
+    notify_line.store_token("chan", "revoked", time.time() + 7 * 86400)
+    line_api.revoked.add("revoked")
+    client = notify_line.LineClient("chan", "secret", "U-fallback")
+    assert client.send("hello") == 1
+    assert line_api.issued == ["token-1"]
+    assert notify_line.load_cached_token("chan") == "token-1"
@@ -0,0 +1,54 @@
+"""New-item flags from seen_set, including the kept-output path of the news jobs."""
+
+from __future__ import annotations
+
+import json
+import time
+
+from seen_set import SeenSet, remark_output
+
+
+def test_mark_flags_only_first_sighting(tmp_path):
+    seen = SeenSet("job", tmp_path)
+    items = [{"url": "https://example.com/a?utm_source=x"}, {"url": "https://example.com/b"}]
+    assert seen.mark(items, now=1000) == 2
+    assert all(item["isNew"] for item in items)
+    again = [{"url": "https://example.com/a"}, {"url": "https://example.com/c"}]
+    assert seen.mark(again, now=2000) == 1
+    assert [item["isNew"] for item in again] == [False, True]
+
+
+def test_remark_output_clears_stale_flags(tmp_path):
+    news = [{"url": "https://example.com/a"}, {"url": "https://example.com/b"}]
+    # Marked by the run an hour ago that first saw them.
+    seen = SeenSet("coffee", tmp_path)
+    assert seen.mark(news, now=time.time() - 3600) == 2
+    seen.save()
+    out_file = tmp_path / "coffee_news.json"
+    out_file.write_text(
+        json.dumps({"ok": True, "newsZh": news[:1], "newsEn": news[1:], "news": news, "newCount": 2}),
+        encoding="utf-8",
+    )
+
+    remark_output(out_file, "coffee", ("newsZh", "newsEn", "news"), tmp_path)
+
+    data = json.loads(out_file.read_text(encoding="utf-8"))
+    assert data["newCount"] == 0
+    assert not any(item["isNew"] for key in ("newsZh", "newsEn", "news") for item in data[key])
+
+
+def test_remark_output_counts_shared_items_once(tmp_path):
+    out_file = tmp_path / "stories.json"
+    story = {"url": "https://example.com/a"}
+    out_file.write_text(json.dumps({"ok": True, "storiesZh": [story], "stories": [story]}), encoding="utf-8")
+
+    remark_output(out_file, "stories", ("storiesZh", "storiesEn", "stories"), tmp_path)
+
+    assert json.loads(out_file.read_text(encoding="utf-8"))["newCount"] == 1
+
+
+def test_remark_output_skips_unreadable_file(tmp_path):
+    out_file = tmp_path / "tw_news.json"
+    out_file.write_text("[]", encoding="utf-8")
+    remark_output(out_file, "tw_news", ("headlines",), tmp_path)
+    assert out_file.read_text(encoding="utf-8") == "[]"
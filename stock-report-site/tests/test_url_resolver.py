@@ -0,0 +1,49 @@
+"""Google News link resolution: per-run fetch cap and the shown-story shortlist."""
+
+from __future__ import annotations
+
+from url_resolver import resolve_urls, shortlist
+
+
+def google_link(n: int) -> str:
+    return f"https://news.google.com/rss/articles/opaque{n}?oc=5"
+
+
+def test_fetches_are_capped_per_run(tmp_path):
+    fetched = []
+
+    def fetch(url, timeout=None):
+        fetched.append(url)
+        return f"https://publisher.example/story/{url[-6]}?utm_source=google"
+
+    links = [google_link(n) for n in range(6)]
+    cache = tmp_path / "resolved.json"
+    out = resolve_urls(links, cache_path=cache, fetch=fetch, max_fetches=4)
+    assert len(fetched) == 4
+    assert [out[u] for u in links[:4]] == [f"https://publisher.example/story/{n}" for n in range(4)]
+    # Over the cap: left as the Google link and picked up by the next run.
+    assert [out[u] for u in links[4:]] == links[4:]
+
+    fetched.clear()
+    out = resolve_urls(links, cache_path=cache, fetch=fetch, max_fetches=4)
+    assert len(fetched) == 2
+    assert out[links[5]] == "https://publisher.example/story/5"
+
+
+def test_publisher_links_are_not_fetched(tmp_path):
+    def fetch(url, timeout=None):
+        raise AssertionError(f"unexpected fetch of {url}")
+
+    url = "https://publisher.example/a?utm_medium=rss"
+    assert resolve_urls([url], cache_path=tmp_path / "resolved.json", fetch=fetch) == {url: url}
+
+
+def test_shortlist_drops_items_resolved_to_the_same_article():
+    items = [
+        {"title": "A", "url": "https://publisher.example/a"},
+        {"title": "A again", "url": "https://publisher.example/a?utm_source=x"},
+        {"title": "B", "url": "https://publisher.example/b"},
+        {"title": "C", "url": "https://publisher.example/c"},
+    ]
+    assert [x["title"] for x in shortlist(items, 2)] == ["A", "B"]
+    assert [x["title"] for x in shortlist(items, 5)] == ["A", "B", "C"]